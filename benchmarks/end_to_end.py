@@ -0,0 +1,106 @@
+from time import perf_counter_ns
+
+from benchmarks.harness import benchmark, make_ticks
+from utils.metrics import Histogram
+from utils.tick_codec import END_OF_SESSION
+
+# "fake" runs against an in-process fakeredis server, "local" against the
+# Redis configured for utils.redis_pool
+REDIS_MODE = {"mode": "fake"}
+QUEUE_NAME = "bench:instrument"
+
+
+def use_redis(mode):
+    REDIS_MODE["mode"] = mode
+
+
+def _redis_client():
+    if REDIS_MODE["mode"] == "local":
+        return None
+    import fakeredis
+
+    return fakeredis.FakeRedis(decode_responses=True)
+
+
+def _instrument_run(size, stages, batch_mode=False):
+    import backtrader as bt
+
+    from feeds.instrument_feed import InstrumentFeed
+    from utils.redis_queue import RedisQueue
+
+    class TimedInstrumentFeed(InstrumentFeed):
+        def _load(self):
+            started = perf_counter_ns()
+            loaded = super()._load()
+            self.load_latency.observe(perf_counter_ns() - started)
+            return loaded
+
+    client = _redis_client()
+    pool_config = {"client": client} if client is not None else {}
+    queue = RedisQueue(QUEUE_NAME, **pool_config)
+    queue.remove_all()
+    epochs, prices = make_ticks(size)
+    queue.push_many(
+        [{"epoch": epoch, "ltp": price} for epoch, price in zip(epochs, prices)]
+        + [END_OF_SESSION]
+    )
+
+    source = {
+        "feed_name": "BENCH",
+        "feed_type": "OHLC_QUEUE_FEED",
+        "redis_feed_key": QUEUE_NAME,
+        "redis_pool_config": pool_config,
+        "batch_size": 500,
+    }
+    feed = TimedInstrumentFeed(
+        name="BENCH",
+        # Every day, the generated ticks may fall on a weekend
+        session_time={"weekdays": range(7)},
+        idle_policy={"idle_timeout": 1},
+        batch_mode=batch_mode,
+        feed_type="PIPELINE_FEED",
+        pipeline_feed_config={
+            "feed_name": "bench_pipeline",
+            "sub_feed_configs": [source, *stages],
+        },
+        timeframe=bt.TimeFrame.Seconds,
+        compression=1,
+    )
+    feed.load_latency = Histogram("bench_load_latency")
+
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(bt.Strategy)
+
+    def run():
+        cerebro.run()
+        return {
+            "bars": len(feed),
+            "load_p50_seconds": feed.load_latency.quantile(0.5),
+            "load_p99_seconds": feed.load_latency.quantile(0.99),
+        }
+
+    return run
+
+
+@benchmark("instrument_feed_ticks", group="end_to_end")
+def instrument_feed_ticks(size):
+    return _instrument_run(size, [])
+
+
+RESAMPLE_STAGE = {
+    "feed_name": "BENCH",
+    "feed_type": "RESAMPLE_FEED",
+    "time_frame_in_seconds": 5,
+    "completed_bars_only": True,
+}
+
+
+@benchmark("instrument_feed_resample", group="end_to_end")
+def instrument_feed_resample(size):
+    return _instrument_run(size, [dict(RESAMPLE_STAGE)])
+
+
+@benchmark("instrument_feed_resample_batch", group="end_to_end")
+def instrument_feed_resample_batch(size):
+    return _instrument_run(size, [dict(RESAMPLE_STAGE)], batch_mode=True)
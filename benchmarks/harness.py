@@ -0,0 +1,87 @@
+import platform
+import random
+import statistics
+import time
+
+# name -> (group, factory)
+BENCHMARKS = {}
+
+# 2025-04-21 09:00 IST
+START_EPOCH = 1745206200.0
+
+
+def benchmark(name, group="micro"):
+    """Register a benchmark factory.
+
+    The factory gets the number of operations, does its setup and returns a
+    callable running exactly that many operations. Only the callable is
+    timed, it may return a dict of extra stats to report.
+    """
+
+    def register(factory):
+        BENCHMARKS[name] = (group, factory)
+        return factory
+
+    return register
+
+
+def make_ticks(size, step=0.25, seed=7):
+    """Deterministic random walk, epochs step seconds apart"""
+    rng = random.Random(seed)
+    price = 100.0
+    epochs = []
+    prices = []
+    for index in range(size):
+        price += rng.uniform(-0.05, 0.05)
+        epochs.append(START_EPOCH + index * step)
+        prices.append(round(price, 2))
+    return epochs, prices
+
+
+def run_benchmark(name, size, repeats):
+    group, factory = BENCHMARKS[name]
+    timings = []
+    extra = {}
+    for _ in range(repeats):
+        try:
+            run = factory(size)
+        except ImportError as e:
+            return {"group": group, "skipped": f"missing dependency: {e.name}"}
+        started = time.perf_counter()
+        extra = run() or {}
+        timings.append(time.perf_counter() - started)
+
+    best = min(timings)
+    return {
+        "group": group,
+        "ops": size,
+        "repeats": repeats,
+        "best_seconds": best,
+        "median_seconds": statistics.median(timings),
+        "ops_per_sec": size / best,
+        **extra,
+    }
+
+
+def environment():
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": platform.machine(),
+        "system": platform.system(),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Benchmarks whose throughput dropped more than threshold below baseline"""
+    thresholds = baseline.get("thresholds", {})
+    regressions = []
+    for name, result in results.items():
+        previous = baseline["results"].get(name)
+        if not previous or "ops_per_sec" not in result or "ops_per_sec" not in previous:
+            continue
+        ratio = result["ops_per_sec"] / previous["ops_per_sec"]
+        result["baseline_ratio"] = ratio
+        if ratio < 1 - thresholds.get(name, threshold):
+            regressions.append((name, ratio))
+    return regressions
@@ -0,0 +1,144 @@
+from benchmarks.harness import START_EPOCH, benchmark, make_ticks
+from feeds import EndOfSession
+from models import FeedData
+
+
+def _feed_datas(size, symbol="BENCH"):
+    epochs, prices = make_ticks(size)
+    return [
+        FeedData(int(epoch * 1e9), price, price, price, price, 1, symbol)
+        for epoch, price in zip(epochs, prices)
+    ]
+
+
+@benchmark("feed_data_arithmetic")
+def feed_data_arithmetic(size):
+    epoch_ns = int(START_EPOCH * 1e9)
+    left = FeedData(epoch_ns, 100.0, 101.0, 99.0, 100.5, 10.0, "LEFT")
+    right = FeedData(epoch_ns, 50.0, 51.0, 49.0, 50.5, 20.0, "RIGHT")
+
+    def run():
+        for _ in range(size):
+            abs(left * 2 - right + right)
+
+    return run
+
+
+@benchmark("resampler_update")
+def resampler_update(size):
+    from utils.resampler_util import DataResampler
+
+    feed_datas = _feed_datas(size)
+
+    def run():
+        sampler = DataResampler(timeframe_seconds=5)
+        for feed_data in feed_datas:
+            sampler.update(feed_data)
+
+    return run
+
+
+@benchmark("renko_create_new_brick")
+def renko_create_new_brick(size):
+    from datetime import datetime
+
+    from utils.renko_util import Renko
+
+    epochs, prices = make_ticks(size)
+    timestamps = [datetime.fromtimestamp(epoch) for epoch in epochs]
+
+    def run():
+        renko = Renko(brick_size=0.1, multi_brick=False)
+        for close, timestamp in zip(prices, timestamps):
+            renko.create_new_brick(close=close, time_stamp=timestamp)
+
+    return run
+
+
+def _resample_pipeline(size):
+    from feeds.feed_helper import FeedHelper
+
+    epochs, prices = make_ticks(size)
+    return FeedHelper(
+        feed_type="PIPELINE_FEED",
+        pipeline_feed_config={
+            "feed_name": "bench_pipeline",
+            "sub_feed_configs": [
+                {
+                    "feed_name": "BENCH",
+                    "feed_type": "ARRAY_REPLAY_FEED",
+                    "data": {"epoch": epochs, "ltp": prices},
+                },
+                {
+                    "feed_name": "BENCH",
+                    "feed_type": "RESAMPLE_FEED",
+                    "time_frame_in_seconds": 5,
+                    "completed_bars_only": True,
+                },
+            ],
+        },
+    )
+
+
+@benchmark("pipeline_feed_next")
+def pipeline_feed_next(size):
+    feed = _resample_pipeline(size)
+
+    def run():
+        try:
+            while True:
+                feed.next()
+        except EndOfSession:
+            pass
+
+    return run
+
+
+@benchmark("pipeline_feed_next_batch")
+def pipeline_feed_next_batch(size):
+    feed = _resample_pipeline(size)
+
+    def run():
+        try:
+            while True:
+                feed.next_batch()
+        except EndOfSession:
+            pass
+
+    return run
+
+
+@benchmark("aggregator_evaluate_data")
+def aggregator_evaluate_data(size):
+    from feeds.aggregator_feed import AggregatorFeed
+
+    epochs, prices = make_ticks(1)
+    data = {"epoch": epochs, "ltp": prices}
+    feed = AggregatorFeed(
+        feed_name="bench_spread",
+        sub_feed_configs=[
+            {
+                "feed_name": "LEFT",
+                "feed_type": "ARRAY_REPLAY_FEED",
+                "data": data,
+                "operator": "ADD",
+            },
+            {
+                "feed_name": "RIGHT",
+                "feed_type": "ARRAY_REPLAY_FEED",
+                "data": data,
+                "operator": "SUBSTRACT",
+                "multiplier": 2,
+            },
+        ],
+    )
+    legs = [
+        {"LEFT": left, "RIGHT": right}
+        for left, right in zip(_feed_datas(size, "LEFT"), _feed_datas(size, "RIGHT"))
+    ]
+
+    def run():
+        for new_datas in legs:
+            feed.evaluate_data(new_datas)
+
+    return run
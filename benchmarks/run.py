@@ -0,0 +1,110 @@
+"""Benchmark runner.
+
+    python -m benchmarks.run                   run everything, compare to baseline
+    python -m benchmarks.run --only micro      one group or benchmark names
+    python -m benchmarks.run --save-baseline   store this run as the baseline
+    python -m benchmarks.run --no-compare      just measure, no baseline needed
+
+Results are written as JSON. The run exits non-zero when any benchmark's
+ops/sec drops more than --threshold below the baseline, and also when there
+is no baseline to compare against. Baselines are machine specific, save
+them on the box the comparison runs on. Needs the packages listed in
+requirements-dev.txt.
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+from benchmarks import end_to_end, micro  # noqa: F401, registers benchmarks
+from benchmarks.harness import BENCHMARKS, compare, environment, run_benchmark
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Feed hot path benchmarks")
+    parser.add_argument("--only", nargs="*", help="benchmark names or groups")
+    parser.add_argument("--size", type=int, default=100000, help="ops per run")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--redis", choices=("fake", "local"), default="fake")
+    parser.add_argument(
+        "--output", default=os.path.join(BENCHMARK_DIR, "results.json")
+    )
+    parser.add_argument(
+        "--baseline", default=os.path.join(BENCHMARK_DIR, "baseline.json")
+    )
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument(
+        "--no-compare", action="store_true", help="skip the baseline comparison"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.10,
+        help="allowed ops/sec drop against the baseline, 0.10 is 10%%",
+    )
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    end_to_end.use_redis(args.redis)
+
+    names = [
+        name
+        for name, (group, _) in BENCHMARKS.items()
+        if not args.only or name in args.only or group in args.only
+    ]
+    results = {}
+    for name in names:
+        results[name] = result = run_benchmark(name, args.size, args.repeats)
+        if "skipped" in result:
+            print(f"{name:32} skipped, {result['skipped']}")
+        else:
+            print(f"{name:32} {result['ops_per_sec']:>14,.0f} ops/s")
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": environment(),
+        "size": args.size,
+        "repeats": args.repeats,
+        "results": results,
+    }
+
+    status = 0
+    if args.save_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.no_compare:
+        pass
+    elif os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        report["regressions"] = dict(regressions)
+        for name, ratio in regressions:
+            print(f"REGRESSION {name}: {ratio:.0%} of baseline ops/sec")
+        if regressions:
+            status = 1
+        for name, result in results.items():
+            if "ops_per_sec" in result and name not in baseline["results"]:
+                print(f"WARNING {name}: not in the baseline, not compared")
+    else:
+        print(
+            f"ERROR no baseline at {args.baseline}, nothing was compared. "
+            "Save one with --save-baseline or pass --no-compare.",
+            file=sys.stderr,
+        )
+        status = 2
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
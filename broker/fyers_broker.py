@@ -11,6 +11,10 @@ from backtrader.metabase import MetaParams
 
 from fyers_apiv3 import fyersModel
 
+from utils.log_util import get_logger
+
+logger = get_logger("broker")
+
 
 # class MetaFyersBroker(MetaBroker, MetaParams):
 #     def __init__(cls, name, bases, dct):
@@ -114,22 +118,22 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
         if self.fyers_client:
             try:
                 response = self.fyers_client.funds()
-                print("Response: ", response)
+                logger.debug("Response: %s", response)
                 if response["s"] == "ok":
                     for fund in response["fund_limit"]:
                         if fund["id"] == 1:
-                            print("Balance: ", fund["equityAmount"])
+                            logger.info("Balance: %s", fund["equityAmount"])
                             self.cash_available = fund["equityAmount"]
                             return self.cash_available
             except Exception as e:
-                print(f"Error getting cash: {e}")
+                logger.error("Error getting cash: %s", e)
                 return self.cash_available or 0
 
         return super(FyersBroker, self).getcash()
 
     @rate_limit(10)
     def getvalue(self):
-        print("Broker value")
+        logger.debug("Broker value")
         # If paper trading, return super implementation
         if self.p.paper_trading:
             return super(FyersBroker, self).getvalue()
@@ -146,7 +150,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                         value += position["realized_profit"]
                         value += position["unrealized_profit"]
             except Exception as e:
-                print(f"Error getting positions value: {e}")
+                logger.error("Error getting positions value: %s", e)
 
         return value
 
@@ -169,7 +173,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                             price = position["netAvg"]
                             return Position(size, price)
             except Exception as e:
-                print(f"Error getting position: {e}")
+                logger.error("Error getting position: %s", e)
 
         return self.positions[data._name]
 
@@ -356,7 +360,18 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                     multiplier=multiplier,
                     close_position=close_position,
                 )
-                print(datetime.datetime.now(), "Triggered order api")
+                logger.info(
+                    "Triggered order api",
+                    extra={
+                        "fields": {
+                            "ref": order.ref,
+                            "symbol": order_params["symbol"],
+                            "side": order_params["side"],
+                            "qty": order_params["qty"],
+                            "type": order_params["type"],
+                        }
+                    },
+                )
                 response = self.fyers_client.place_order(order_params)
 
                 if response["s"] == "ok":
@@ -364,14 +379,23 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                     self._accept(order)
                 else:
                     self._reject(order)
-                    print(f"Order rejected: {response['message']}")
+                    logger.warning(
+                        "Order rejected",
+                        extra={
+                            "fields": {
+                                "ref": order.ref,
+                                "symbol": ticker,
+                                "reason": response["message"],
+                            }
+                        },
+                    )
 
             elif order_type == "BUCKET":
                 # Handle bucket order (multiple orders)
                 bucket_orders = order_details.get("bucketOrders", [])
                 if not bucket_orders:
                     self._reject(order)
-                    print("Bucket order with no orders specified")
+                    logger.warning("Bucket order with no orders specified")
                     return order
 
                 # Prepare orders list for batch submission
@@ -396,10 +420,14 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
 
                 if not orders_params:
                     self._reject(order)
-                    print("No valid orders in bucket")
+                    logger.warning("No valid orders in bucket")
                     return order
 
                 # Submit batch order
+                logger.info(
+                    "Triggered bucket order api",
+                    extra={"fields": {"ref": order.ref, "orders": len(orders_params)}},
+                )
                 response = self.fyers_client.place_basket_orders(data=orders_params)
 
                 if response["s"] == "ok":
@@ -412,8 +440,15 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                             order.fyers_order_ids.append(order_response["id"])
                         else:
                             all_successful = False
-                            print(
-                                f"Sub-order {i} rejected: {order_response['message']}"
+                            logger.warning(
+                                "Sub-order rejected",
+                                extra={
+                                    "fields": {
+                                        "ref": order.ref,
+                                        "index": i,
+                                        "reason": order_response["message"],
+                                    }
+                                },
                             )
 
                     if all_successful:
@@ -428,13 +463,18 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                             self._reject(order)
                 else:
                     self._reject(order)
-                    print(f"Bucket order rejected: {response['message']}")
+                    logger.warning(
+                        "Bucket order rejected",
+                        extra={
+                            "fields": {"ref": order.ref, "reason": response["message"]}
+                        },
+                    )
             else:
                 self._reject(order)
-                print(f"Unknown order type: {order_type}")
+                logger.warning("Unknown order type: %s", order_type)
 
         except Exception as e:
-            print(f"Error processing order: {e}")
+            logger.error("Error processing order: %s", e)
             self._reject(order)
 
         return order
@@ -452,12 +492,19 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                     response = self.fyers_client.cancel_order({"id": order_id})
                     if response["s"] != "ok":
                         cancelled_all = False
-                        print(
-                            f"Failed to cancel order {order_id}: {response['message']}"
+                        logger.warning(
+                            "Failed to cancel order",
+                            extra={
+                                "fields": {
+                                    "ref": order.ref,
+                                    "order_id": order_id,
+                                    "reason": response["message"],
+                                }
+                            },
                         )
                 except Exception as e:
                     cancelled_all = False
-                    print(f"Error cancelling order {order_id}: {e}")
+                    logger.error("Error cancelling order %s: %s", order_id, e)
 
             if cancelled_all:
                 self._cancel(order)
@@ -474,9 +521,18 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
             if response["s"] == "ok":
                 self._cancel(order)
             else:
-                print(f"Failed to cancel order: {response['message']}")
+                logger.warning(
+                    "Failed to cancel order",
+                    extra={
+                        "fields": {
+                            "ref": order.ref,
+                            "order_id": order.fyers_order_id,
+                            "reason": response["message"],
+                        }
+                    },
+                )
         except Exception as e:
-            print(f"Error cancelling order: {e}")
+            logger.error("Error cancelling order: %s", e)
 
     def get_order_details(self, order):
         """
@@ -488,7 +544,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
         Returns:
             Order details dictionary from Fyers, or None if not found
         """
-        print("Get _ order_ details")
+        logger.debug("Get order details")
         if self.p.paper_trading or not self.fyers_client:
             return None
 
@@ -502,7 +558,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                     if order_detail["id"] == order.fyers_order_id:
                         return order_detail
         except Exception as e:
-            print(f"Error getting order details: {e}")
+            logger.error("Error getting order details: %s", e)
 
         return None
 
@@ -522,7 +578,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
             if response["s"] == "ok":
                 return response["orderBook"]
         except Exception as e:
-            print(f"Error getting orders: {e}")
+            logger.error("Error getting orders: %s", e)
 
         return []
 
@@ -534,7 +590,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
         Returns:
             List of position details dictionaries, or empty list if error
         """
-        print("get_positions")
+        logger.debug("get_positions")
         if self.p.paper_trading or not self.fyers_client:
             return []
 
@@ -543,7 +599,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
             if response["s"] == "ok":
                 return response["netPositions"]
         except Exception as e:
-            print(f"Error getting positions: {e}")
+            logger.error("Error getting positions: %s", e)
 
         return []
 
@@ -562,7 +618,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                 price = position["netAvg"]
                 self.positions[symbol] = Position(size, price)
         except Exception as e:
-            print(f"Error updating positions: {e}")
+            logger.error("Error updating positions: %s", e)
 
     @rate_limit(10)
     def next(self):
@@ -586,7 +642,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
 
                 all_accepted = True
                 prices = []
-                print("Filtered orders: ", filtered_fyers_orders)
+                logger.debug("Filtered orders: %s", filtered_fyers_orders)
 
                 for fyers_order in filtered_fyers_orders:
                     status = fyers_order["status"]
@@ -606,7 +662,7 @@ class FyersBroker(BrokerBase, metaclass=MetaParams):
                     self._fill(order, sum(prices) / len(prices), 0)
 
         except Exception as e:
-            print(f"Error updating orders: {e}")
+            logger.error("Error updating orders: %s", e)
 
     def linked_orders(self, order, fyers_orders: List):
         fyers_order_ids = []
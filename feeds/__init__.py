@@ -1,10 +1,72 @@
-from models import FeedData
+from models import FeedData, FeedBatch
+from utils.log_util import get_logger
+
+logger = get_logger("feeds")
+
+
+class EndOfSession(Exception):
+    """Raised by a source feed once its producer signalled the session end"""
 
 
 class BaseFeed:
+    # Source feeds clear this while they still hold unread ticks, so a None
+    # from the pipeline is not mistaken for an idle feed
+    drained = True
+    # Set by a source feed that hit the session end with rows still to return
+    end_pending = False
+    # time.monotonic() of the last producer heartbeat a source feed read
+    last_heartbeat = None
+
     def __init__(self, **configs):
-        print(configs)
+        logger.debug("Feed configs: %s", configs)
         self.name = configs["feed_name"]
+        # Most rows a source feed returns per next_batch call
+        self.batch_rows = configs.get("batch_rows", 1000)
 
     def next(self, data: FeedData) -> FeedData:
         raise NotImplementedError
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        """Batch form of next, returns None when nothing came out.
+
+        This default runs next once per row so per-tick feeds work inside
+        batch pipelines, vectorized feeds override it. Source feeds get None
+        and return up to batch_rows rows.
+        """
+        if batch is not None:
+            feed_datas = [self.next(data) for data in batch.to_feed_datas()]
+            feed_datas = [data for data in feed_datas if data is not None]
+            if not feed_datas:
+                return None
+            return FeedBatch.from_feed_datas(feed_datas, self.name)
+
+        if self.end_pending:
+            raise EndOfSession(self.name)
+        feed_datas = []
+        try:
+            while len(feed_datas) < self.batch_rows:
+                data = self.next(None)
+                if data is None:
+                    break
+                feed_datas.append(data)
+        except EndOfSession:
+            if not feed_datas:
+                raise
+            self.end_pending = True
+        if not feed_datas:
+            return None
+        return FeedBatch.from_feed_datas(feed_datas, self.name)
+
+    async def next_async(self, data: FeedData) -> FeedData:
+        # Pure computation stages have nothing to await
+        return self.next(data)
+
+    def source_feeds(self) -> list:
+        """Feeds reading ticks from outside the pipeline"""
+        return []
+
+    def close(self):
+        """Called once the session is over, flush or release what is held"""
+
+    async def close_async(self):
+        """Release what next_async opened, called on the loop it ran on"""
@@ -1,8 +1,33 @@
-from . import FeedData, BaseFeed
+from . import FeedData, FeedBatch, BaseFeed, EndOfSession
 from typing import Dict, List
+from time import perf_counter_ns
+from utils.metrics import get_registry
+from utils.expression_util import Expression
+import asyncio
+import numpy as np
+import time
+
+PRICE_FIELDS = ("open", "high", "low", "close", "volume")
 
 
 class AggregatorFeed(BaseFeed):
+    """Derived feed combining its legs with a formula.
+
+    formula names legs by their "alias", or their feed_name, e.g.
+    "2*NIFTY - 1.5*BANKNIFTY" or "A/B". Without a formula the legacy
+    operator ("ADD"/"SUBSTRACT") and multiplier of each leg are used, as
+    abs() of their weighted sum. Open, high, low and close go through the
+    formula, volume is the weighted sum of leg volumes for linear formulas
+    and 0 otherwise.
+
+    Linear formulas keep a running aggregate, a leg update only applies its
+    own delta and the aggregate is rebuilt every full_recompute_every
+    updates to bound float drift. Output is held back while the newest and
+    oldest leg data are more than as_of_tolerance_seconds apart, or while a
+    leg has delivered nothing for its max_staleness_seconds (wall clock, set
+    per leg or for all legs).
+    """
+
     def __init__(self, **configs):
         from feeds.feed_helper import FeedHelper
 
@@ -13,43 +38,403 @@ class AggregatorFeed(BaseFeed):
             self.feeds.append(FeedHelper(**sub_feed_config).feed)
 
         self.prev_feed_data = {feed.name: None for feed in self.feeds}
+        # Leg rows next_batch read but did not join yet, one slot per leg
+        self.held_batches = [None] * len(self.feeds)
+        # Pending next_async wait of every leg, see next_async
+        self.leg_tasks = [None] * len(self.feeds)
+
+        formula = configs.get("formula")
+        if formula is None:
+            leg_names = [f"leg{index}" for index in range(len(self.feeds))]
+            formula = self._legacy_formula(leg_names)
+        else:
+            leg_names = [
+                sub_feed_config.get("alias", sub_feed_config["feed_name"])
+                for sub_feed_config in self.sub_feed_configs
+            ]
+        self.expression = Expression(formula)
+        unknown = set(self.expression.names) - set(leg_names)
+        if unknown:
+            raise Exception(f"Unknown legs {sorted(unknown)} in formula {formula!r}")
+        # Feed names of the formula legs, in the order the plan loads them
+        self.leg_keys = [
+            self.feeds[leg_names.index(name)].name for name in self.expression.names
+        ]
+        self.leg_weights = (
+            self.expression.weights.tolist() if self.expression.is_linear else None
+        )
+
+        # Running state, kept up to date one leg update at a time
+        self.feed_weights = None
+        if self.leg_weights is not None:
+            weights = dict(zip(self.leg_keys, self.leg_weights))
+            self.feed_weights = {
+                feed.name: weights.get(feed.name, 0.0) for feed in self.feeds
+            }
+        self.running = None
+        self.updates = 0
+        self.full_recompute_every = configs.get("full_recompute_every", 10000)
+        self.missing_legs = len(self.feeds)
+        self.max_epoch_ns = 0
+        self.max_tick_epoch_ns = 0
+
+        tolerance = configs.get("as_of_tolerance_seconds")
+        self.as_of_tolerance_ns = None if tolerance is None else int(tolerance * 1e9)
+        self.oldest_epoch_ns = 0
+        self.oldest_dirty = True
+
+        staleness = configs.get("max_staleness_seconds")
+        self.max_staleness = {
+            feed.name: sub_feed_config.get("max_staleness_seconds", staleness)
+            for feed, sub_feed_config in zip(self.feeds, self.sub_feed_configs)
+        }
+        self.check_staleness = any(
+            limit is not None for limit in self.max_staleness.values()
+        )
+        self.leg_deadlines = {feed.name: float("inf") for feed in self.feeds}
+        self.earliest_deadline = float("inf")
+        self.deadline_dirty = False
+
+        self.leg_latencies = None
+        if configs.get("metrics_enabled", False):
+            registry = get_registry()
+            self.leg_latencies = [
+                registry.histogram(
+                    "feed_stage_latency_seconds", pipeline=self.name, stage=feed.name
+                )
+                for feed in self.feeds
+            ]
 
     def next(self, data: FeedData) -> FeedData:
-        new_feed_datas = {}
-        error_count = 0
+        if self.leg_latencies is not None:
+            return self._combine(self._timed_legs(data))
+        return self._combine([feed.next(data) for feed in self.feeds])
+
+    def _timed_legs(self, data: FeedData) -> List[FeedData]:
+        leg_feed_datas = []
+        start = perf_counter_ns()
+        for feed, latency in zip(self.feeds, self.leg_latencies):
+            leg_feed_datas.append(feed.next(data))
+            end = perf_counter_ns()
+            latency.observe(end - start)
+            start = end
+        return leg_feed_datas
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        """As-of join of the leg batches.
+
+        Every leg epoch is an output row, each leg contributes its latest
+        row at or before it (or its cached value from earlier batches).
+        Legs size their batches on their own, so rows only go out up to the
+        earliest last epoch among the legs holding rows, later rows are held
+        for the next call. Rows before every leg has data are dropped, like
+        next does.
+        """
+        leg_batches = self._next_leg_batches(batch)
+        present = [leg for leg in leg_batches if leg is not None]
+        if not present:
+            return None
+        epochs = np.unique(np.concatenate([leg.epoch_ns for leg in present]))
+
+        leg_columns = {}
+        for feed, leg in zip(self.feeds, leg_batches):
+            leg_columns[feed.name] = self._as_of(
+                leg, self.prev_feed_data[feed.name], epochs
+            )
+        for feed, leg in zip(self.feeds, leg_batches):
+            if leg is not None:
+                self._update_leg(feed.name, leg.row(-1))
+
+        # Like next, nothing goes out until every leg has data
+        valid = np.ones(len(epochs), dtype=bool)
+        for columns in leg_columns.values():
+            valid &= ~np.isnan(columns[3])
+        if self.as_of_tolerance_ns is not None:
+            oldest = np.minimum.reduce([columns[5] for columns in leg_columns.values()])
+            valid &= epochs - oldest <= self.as_of_tolerance_ns
+        if not valid.any():
+            return None
+        ticks = np.maximum.reduce([columns[6] for columns in leg_columns.values()])
+        columns = self.evaluate_columns(leg_columns)
+        return FeedBatch(
+            epochs[valid],
+            *(column[valid] for column in columns),
+            self.name,
+            ticks[valid],
+        )
+
+    def _next_leg_batches(self, batch: FeedBatch) -> List[FeedBatch]:
+        """Leg rows up to the join cutoff, None for legs with nothing to add"""
+        if self.end_pending:
+            raise EndOfSession(self.name)
+        held_batches = self.held_batches
+        for index, feed in enumerate(self.feeds):
+            held = held_batches[index]
+            if batch is None and held is not None:
+                # A source leg is only read again once its held rows went out
+                continue
+            try:
+                leg = feed.next_batch(batch)
+            except EndOfSession:
+                if all(held is None for held in held_batches):
+                    raise
+                # Like next, the session ends with the first leg, the rows
+                # already read still go out
+                self.end_pending = True
+                break
+            if leg is not None:
+                held_batches[index] = (
+                    leg if held is None else FeedBatch.concatenate([held, leg])
+                )
+
+        lasts = [held.epoch_ns[-1] for held in held_batches if held is not None]
+        if not lasts:
+            return [None] * len(self.feeds)
+        cutoff = min(lasts)
+        leg_batches = []
+        for index, held in enumerate(held_batches):
+            if held is None:
+                leg_batches.append(None)
+                continue
+            count = len(held)
+            if not self.end_pending:
+                count = np.searchsorted(held.epoch_ns, cutoff, side="right")
+            leg_batches.append(held[:count] if count else None)
+            held_batches[index] = held[count:] if count < len(held) else None
+        return leg_batches
+
+    def _as_of(self, leg: FeedBatch, prev: FeedData, epochs):
+        """Leg price, epoch and tick epoch columns aligned to epochs.
+
+        Prices are NaN and epochs 0 where the leg has no data yet.
+        """
+        fields = PRICE_FIELDS + ("epoch_ns", "tick_epoch_ns")
+        if leg is None:
+            return [
+                np.full(
+                    len(epochs),
+                    getattr(prev, field)
+                    if prev is not None
+                    else np.nan if field in PRICE_FIELDS else 0,
+                )
+                for field in fields
+            ]
+        index = np.searchsorted(leg.epoch_ns, epochs, side="right") - 1
+        before = index < 0
+        index[before] = 0
+        columns = []
+        for field in fields:
+            column = getattr(leg, field)[index]
+            if before.any():
+                if prev is not None:
+                    column[before] = getattr(prev, field)
+                else:
+                    column[before] = np.nan if field in PRICE_FIELDS else 0
+            columns.append(column)
+        return columns
+
+    def evaluate_columns(self, leg_columns):
+        """evaluate_data over aligned leg columns"""
+        legs = [leg_columns[key] for key in self.leg_keys]
+        length = len(next(iter(leg_columns.values()))[0])
+        expression = self.expression
+        if not expression.is_linear:
+            prices = [
+                expression.evaluate_columns([columns[field] for columns in legs])
+                for field in range(4)
+            ]
+            return prices + [np.zeros(length)]
+
+        totals = [np.full(length, expression.constant) for _ in range(4)]
+        totals.append(np.zeros(length))
+        for columns, weight in zip(legs, self.leg_weights):
+            for total, column in zip(totals, columns):
+                total += column * weight
+        if expression.outer_abs:
+            for total in totals:
+                np.abs(total, out=total)
+        return totals
+
+    def source_feeds(self):
+        return [source for feed in self.feeds for source in feed.source_feeds()]
+
+    def close(self):
         for feed in self.feeds:
-            new_feed_data = feed.next(data)
-            # print(new_feed_data)
-            if new_feed_data is not None:
-                new_feed_datas[feed.name] = new_feed_data
+            feed.close()
+
+    async def next_async(self, data: FeedData) -> FeedData:
+        if data is not None:
+            # Derived legs only compute, nothing to wait for
+            return self._combine(
+                await asyncio.gather(*[feed.next_async(data) for feed in self.feeds])
+            )
+
+        # Every source leg keeps one wait pending across calls, whatever leg
+        # finishes first goes out without waiting on the quiet ones
+        tasks = self.leg_tasks
+        for index, feed in enumerate(self.feeds):
+            if tasks[index] is None:
+                tasks[index] = asyncio.ensure_future(feed.next_async(None))
+        done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+
+        leg_feed_datas = [None] * len(tasks)
+        error = None
+        for index, task in enumerate(tasks):
+            if task not in done:
+                continue
+            tasks[index] = None
+            if task.exception() is not None:
+                error = error or task.exception()
             else:
-                error_count += 1
-                new_feed_datas[feed.name] = self.prev_feed_data[feed.name]
+                leg_feed_datas[index] = task.result()
+        combined = self._combine(leg_feed_datas)
+        if error is not None:
+            raise error
+        return combined
 
-        if error_count == len(new_feed_datas):
-            return None
+    def _combine(self, leg_feed_datas: List[FeedData]) -> FeedData:
+        updated = False
+        for feed, new_feed_data in zip(self.feeds, leg_feed_datas):
+            if new_feed_data is not None:
+                self._update_leg(feed.name, new_feed_data)
+                updated = True
 
-        if None in new_feed_datas.values():
-            self.prev_feed_data = new_feed_datas
+        if not updated or self.missing_legs or not self._is_aligned():
             return None
 
-        derived_feed_data = self.evaluate_data(new_feed_datas)
-        self.prev_feed_data = new_feed_datas
+        if self.running is None:
+            return self.evaluate_data(self.prev_feed_data)
+        if self.updates >= self.full_recompute_every:
+            self._recompute()
 
-        return derived_feed_data
+        running = self.running
+        if self.expression.outer_abs:
+            return FeedData(
+                self.max_epoch_ns,
+                abs(running.open),
+                abs(running.high),
+                abs(running.low),
+                abs(running.close),
+                abs(running.volume),
+                self.name,
+                self.max_tick_epoch_ns,
+            )
+        return FeedData(
+            self.max_epoch_ns,
+            running.open,
+            running.high,
+            running.low,
+            running.close,
+            running.volume,
+            self.name,
+            self.max_tick_epoch_ns,
+        )
 
-    def evaluate_data(self, new_datas: Dict[str, FeedData]):
-        max_date = max([new_data.datetime for new_data in new_datas.values()])
-        data = FeedData(max_date, 0, 0, 0, 0, 0, self.name)
+    def _update_leg(self, name, data: FeedData):
+        old = self.prev_feed_data[name]
+        self.prev_feed_data[name] = data
+        if old is None:
+            self.missing_legs -= 1
+            if not self.missing_legs and self.feed_weights is not None:
+                self._recompute()
+        elif self.running is not None:
+            # Only this leg's delta goes into the aggregate
+            weight = self.feed_weights[name]
+            if weight:
+                self.running.add_scaled(old, -weight)
+                self.running.add_scaled(data, weight)
+            self.updates += 1
 
-        for sub_feed_config in self.sub_feed_configs:
-            new_data = new_datas[sub_feed_config["feed_name"]]
+        if data.epoch_ns > self.max_epoch_ns:
+            self.max_epoch_ns = data.epoch_ns
+        if data.tick_epoch_ns > self.max_tick_epoch_ns:
+            self.max_tick_epoch_ns = data.tick_epoch_ns
+        if old is None or old.epoch_ns == self.oldest_epoch_ns:
+            self.oldest_dirty = True
+
+        if self.check_staleness and self.max_staleness[name] is not None:
+            previous = self.leg_deadlines[name]
+            self.leg_deadlines[name] = time.monotonic() + self.max_staleness[name]
+            if previous == self.earliest_deadline:
+                self.deadline_dirty = True
+
+    def _is_aligned(self):
+        # The oldest leg and earliest deadline are only searched for again
+        # once the leg holding them moved
+        if self.as_of_tolerance_ns is not None:
+            if self.oldest_dirty:
+                self.oldest_epoch_ns = min(
+                    data.epoch_ns for data in self.prev_feed_data.values()
+                )
+                self.oldest_dirty = False
+            if self.max_epoch_ns - self.oldest_epoch_ns > self.as_of_tolerance_ns:
+                return False
+
+        if self.check_staleness:
+            if self.deadline_dirty:
+                self.earliest_deadline = min(self.leg_deadlines.values())
+                self.deadline_dirty = False
+            if time.monotonic() > self.earliest_deadline:
+                return False
+        return True
+
+    def _recompute(self):
+        """Rebuild the running aggregate from the current leg datas"""
+        constant = self.expression.constant
+        running = FeedData(0, constant, constant, constant, constant, 0, self.name)
+        for name, data in self.prev_feed_data.items():
+            weight = self.feed_weights[name]
+            if weight:
+                running.add_scaled(data, weight)
+        self.running = running
+        self.updates = 0
+
+    def evaluate_data(self, new_datas: Dict[str, FeedData]):
+        max_epoch_ns = max([new_data.epoch_ns for new_data in new_datas.values()])
+        max_tick_epoch_ns = max(
+            [new_data.tick_epoch_ns for new_data in new_datas.values()]
+        )
+        legs = [new_datas[key] for key in self.leg_keys]
+        expression = self.expression
 
-            new_data *= sub_feed_config.get("multiplier", 1)
+        if not expression.is_linear:
+            evaluate = expression.evaluate
+            return FeedData(
+                max_epoch_ns,
+                evaluate([leg.open for leg in legs]),
+                evaluate([leg.high for leg in legs]),
+                evaluate([leg.low for leg in legs]),
+                evaluate([leg.close for leg in legs]),
+                0,
+                self.name,
+                max_tick_epoch_ns,
+            )
 
-            if sub_feed_config["operator"] == "ADD":
-                data += new_data
-            elif sub_feed_config["operator"] == "SUBSTRACT":
-                data -= new_data
+        # Accumulated in place into data, the leg datas are cached in
+        # prev_feed_data and must not be scaled themselves
+        constant = expression.constant
+        data = FeedData(
+            max_epoch_ns,
+            constant,
+            constant,
+            constant,
+            constant,
+            0,
+            self.name,
+            max_tick_epoch_ns,
+        )
+        for leg, weight in zip(legs, self.leg_weights):
+            data.add_scaled(leg, weight)
+        return abs(data) if expression.outer_abs else data
 
-        return abs(data)
+    def _legacy_formula(self, leg_names):
+        terms = []
+        for leg_name, sub_feed_config in zip(leg_names, self.sub_feed_configs):
+            operator = sub_feed_config.get("operator")
+            if operator not in ("ADD", "SUBSTRACT"):
+                continue
+            sign = "+" if operator == "ADD" else "-"
+            # float() first, the repr of e.g. a numpy scalar is not a number
+            multiplier = float(sub_feed_config.get("multiplier", 1))
+            terms.append(f"{sign} ({multiplier!r}) * {leg_name}")
+        return f"abs({' '.join(terms) or '0'})"
@@ -0,0 +1,44 @@
+from feeds import BaseFeed, FeedData
+from feeds.replay_feed import ArrayReplayFeed
+from utils.tick_archive import TickArchiveWriter, list_days, load_day
+
+
+class RecordFeed(BaseFeed):
+    """Pass-through stage appending every tick it sees to the tick archive"""
+
+    def __init__(self, **configs):
+        super().__init__(**configs)
+        self.writer = TickArchiveWriter(
+            configs["archive_root"],
+            configs.get("symbol", self.name),
+            flush_every=configs.get("flush_every", 1000),
+        )
+
+    def next(self, data: FeedData) -> FeedData:
+        if data is not None:
+            self.writer.append(data.epoch_ns / 1e9, data.close, data.volume)
+        return data
+
+    def close(self):
+        # The last partial chunk is only on disk after this
+        self.writer.close()
+
+
+class ArchiveReplayFeed(ArrayReplayFeed):
+    """Source feed streaming recorded days back from memory-mapped columns"""
+
+    def __init__(self, **configs):
+        self.archive_root = configs["archive_root"]
+        self.symbol = configs.get("symbol", configs["feed_name"])
+        days = configs.get("days")
+        if days is None:
+            days = list_days(self.archive_root, self.symbol)
+        elif not isinstance(days, list):
+            days = [days]
+        self.days = days
+        super().__init__(**configs)
+
+    def _columns_iter(self, configs):
+        # One day at a time, the rest of the archive stays on disk
+        for day in self.days:
+            yield load_day(self.archive_root, self.symbol, day)
@@ -0,0 +1,84 @@
+import asyncio
+import queue
+import threading
+
+from feeds.feed_helper import FeedHelper
+
+
+class AsyncFeedRuntime:
+    """Drives many feeds from one asyncio event loop in a background thread.
+
+    Every registered FeedHelper gets its own task awaiting its queues, so all
+    instruments wait concurrently instead of being polled one after another.
+    Ready bars are handed to the backtrader side through a thread-safe
+    queue.Queue per instrument.
+    """
+
+    def __init__(self, idle_sleep=0.01, handoff_maxsize=0):
+        self.idle_sleep = idle_sleep
+        self.handoff_maxsize = handoff_maxsize
+        # A fresh loop per start, stop closes it
+        self.loop = None
+        self.thread = None
+        self.running = False
+        self.lock = threading.Lock()
+        self.feed_helpers = []
+
+    def register(self, feed_helper: FeedHelper) -> queue.Queue:
+        handoff = queue.Queue(maxsize=self.handoff_maxsize)
+        self.start()
+        self.feed_helpers.append(feed_helper)
+        asyncio.run_coroutine_threadsafe(self._drive(feed_helper, handoff), self.loop)
+        return handoff
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.loop = asyncio.new_event_loop()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Cancel the feed tasks, close their async clients and the loop"""
+        with self.lock:
+            if not self.running:
+                return
+            self.running = False
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.feed_helpers = []
+
+    async def _shutdown(self):
+        current = asyncio.current_task()
+        tasks = [task for task in asyncio.all_tasks() if task is not current]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        # Async clients belong to this loop, they are closed before it is
+        for feed_helper in self.feed_helpers:
+            for feed in feed_helper.source_feeds():
+                await feed.close_async()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _drive(self, feed_helper: FeedHelper, handoff: queue.Queue):
+        while self.running:
+            try:
+                feed_data = await feed_helper.next_async()
+            except Exception as e:
+                # Surface the failure on the consumer side and stop this feed
+                await asyncio.to_thread(handoff.put, e)
+                return
+
+            if feed_data is None:
+                await asyncio.sleep(self.idle_sleep)
+            elif self.handoff_maxsize:
+                await asyncio.to_thread(handoff.put, feed_data)
+            else:
+                handoff.put_nowait(feed_data)
@@ -1,10 +1,15 @@
-from feeds import BaseFeed, FeedData
+from feeds import BaseFeed, FeedData, FeedBatch
 from feeds.resampler_feed import ResampleFeed
 from feeds.aggregator_feed import AggregatorFeed
-from feeds.ohlc_feed import OHLCQueueFeed
+from feeds.ohlc_feed import OHLCQueueFeed, ShmQueueFeed
 from feeds.pipeline_feed import PipelineFeed
 from feeds.renko_feed import RenkoFeed
+from feeds.archive_feed import RecordFeed, ArchiveReplayFeed
+from feeds.replay_feed import ArrayReplayFeed
 from utils.redis_queue import RedisQueue
+from utils.redis_stream_queue import RedisStreamQueue
+from utils.fan_in_consumer import get_fan_in_consumer
+from utils.shm_ring_buffer import ShmTickRing
 
 
 class FeedHelper:
@@ -14,6 +19,18 @@ class FeedHelper:
     def next(self) -> FeedData:
         return self.feed.next(None)
 
+    def next_batch(self) -> FeedBatch:
+        return self.feed.next_batch(None)
+
+    def source_feeds(self):
+        return self.feed.source_feeds()
+
+    def close(self):
+        self.feed.close()
+
+    async def next_async(self) -> FeedData:
+        return await self.feed.next_async(None)
+
     def get_feed(self, config):
         if "feed_type" in config:
             feed_type = config.pop("feed_type")
@@ -21,12 +38,15 @@ class FeedHelper:
             raise Exception("Feed Type not provided")
 
         if feed_type == "OHLC_QUEUE_FEED":
-            queue_key = config.pop("redis_feed_key")
-            queue = RedisQueue(queue_key)
-            return OHLCQueueFeed(queue=queue, **config)
+            return OHLCQueueFeed(queue=self.get_queue(config), **config)
+        elif feed_type == "SHM_QUEUE_FEED":
+            ring = ShmTickRing(
+                config.pop("shm_name"), start=config.pop("shm_start", "oldest")
+            )
+            return ShmQueueFeed(ring=ring, **config)
         elif feed_type == "RENKO_FEED":
-            brick_size = config.pop("brick_size")
-            brick_sizer_func = config.pop("brick_sizer_func")
+            brick_size = config.pop("brick_size", None)
+            brick_sizer_func = config.pop("brick_sizer_func", None)
             return RenkoFeed(
                 brick_size=brick_size, brick_sizer=brick_sizer_func, **config
             )
@@ -36,5 +56,42 @@ class FeedHelper:
             return AggregatorFeed(**config.pop("aggregator_feed_config"))
         elif feed_type == "RESAMPLE_FEED":
             return ResampleFeed(**config)
+        elif feed_type == "RECORD_FEED":
+            return RecordFeed(**config)
+        elif feed_type == "ARCHIVE_REPLAY_FEED":
+            return ArchiveReplayFeed(**config)
+        elif feed_type == "ARRAY_REPLAY_FEED":
+            return ArrayReplayFeed(**config)
 
         raise Exception("Invalid feed type")
+
+    def get_queue(self, config):
+        queue_key = config.pop("redis_feed_key")
+        queue_backend = config.pop("queue_backend", "LIST")
+        codec = config.pop("codec", "JSON")
+        pool_config = config.pop("redis_pool_config", {})
+
+        if queue_backend == "LIST" and "fan_in_group" in config:
+            consumer = get_fan_in_consumer(
+                config.pop("fan_in_group"), codec=codec, **pool_config
+            )
+            return consumer.register(queue_key)
+        elif queue_backend == "LIST":
+            return RedisQueue(
+                queue_key,
+                codec=codec,
+                maxlen=config.pop("queue_maxlen", None),
+                overflow_policy=config.pop("overflow_policy", "DROP_OLDEST"),
+                **pool_config,
+            )
+        elif queue_backend == "STREAM":
+            return RedisStreamQueue(
+                queue_key,
+                codec=codec,
+                group=config.pop("consumer_group", "default"),
+                consumer=config.pop("consumer_name", "main"),
+                maxlen=config.pop("stream_maxlen", None),
+                **pool_config,
+            )
+
+        raise Exception("Invalid queue backend")
@@ -1,32 +1,99 @@
 import backtrader as bt
+from feeds import EndOfSession
 from feeds.feed_helper import FeedHelper
 from models import FeedData
-from datetime import datetime
-from dateutil import parser
+from utils.session_calendar import SessionCalendar
+from utils.log_util import get_logger, SampledLogger
+from utils.metrics import get_registry
+from utils.queue_loader import read_ticks
+from collections import deque
+import queue
+import time
+
+logger = get_logger("feeds.instrument")
 
 
 class InstrumentFeed(bt.DataBase):
     def __init__(self, **configs):
-        print(configs)
-        self.session_time = configs.pop("session_time")
+        logger.debug("Instrument feed configs: %s", configs)
+        self.tick_logger = SampledLogger(logger, configs.pop("log_every_n_bars", 100))
+        self.session_calendar = SessionCalendar.from_config(
+            configs.pop("session_time")
+        )
+        async_runtime = configs.pop("async_runtime", None)
+        self.tick_to_bar_latency = None
+        if configs.pop("metrics_enabled", False):
+            self.tick_to_bar_latency = get_registry().histogram(
+                "tick_to_bar_latency_seconds", feed=configs.get("name", "")
+            )
+        # mode BACKOFF sleeps with exponential backoff while idle, POLL
+        # returns straight back to backtrader. Blocking waits are configured
+        # on the queue feed itself ("blocking": True). Bars from an async
+        # runtime are waited for up to handoff_timeout instead. The session
+        # only ends on idleness if idle_timeout is set, producer heartbeats
+        # (utils.tick_codec.HEARTBEAT) count as activity. heartbeat_seconds
+        # is how often the idle state is logged.
+        idle_policy = configs.pop("idle_policy", {})
+        self.idle_mode = idle_policy.get("mode", "BACKOFF")
+        self.idle_timeout = idle_policy.get("idle_timeout")
+        self.heartbeat_seconds = idle_policy.get("heartbeat_seconds", 30)
+        self.min_idle_sleep = idle_policy.get("min_sleep", 0.001)
+        self.max_idle_sleep = idle_policy.get("max_sleep", 0.5)
+        self.handoff_timeout = idle_policy.get("handoff_timeout", 0.5)
+        self.idle_sleep = self.min_idle_sleep
+        self.idle_since = time.monotonic()
+        self.next_heartbeat = self.idle_since + self.heartbeat_seconds
+
+        warmup = configs.pop("warmup", None)
+        self.max_ticks_per_load = configs.pop("max_ticks_per_load", 1000)
+        # batch_mode runs the pipeline on FeedBatch chunks, the bars of a
+        # chunk are then handed to backtrader one per _load
+        self.batch_mode = configs.pop("batch_mode", False)
+        self.pending_bars = deque()
+
         self.feed_helper = FeedHelper(**configs)
-        self.last_update = datetime.now()
+        self.source_feeds = self.feed_helper.source_feeds()
+        # Bars completed by a tick up to this epoch are warm-up history
+        self.warmup_until_ns = None
+        if warmup:
+            self._preload_warmup(warmup if isinstance(warmup, list) else [warmup])
 
-    def _load(self):
-        if (datetime.now().timestamp() - self.last_update.timestamp()) > 10:
-            print("Time Out")
-            return False
+        # With a runtime the feed is driven elsewhere and bars arrive here
+        self.handoff = None
+        if async_runtime is not None:
+            self.handoff = async_runtime.register(self.feed_helper)
 
+    def _load(self):
         try:
-            data_feed_dto: FeedData = self.feed_helper.next()
-
-            if data_feed_dto is None:
+            # Ticks that do not complete a bar are not idleness, keep pulling
+            # while the sources still hold data
+            for _ in range(self.max_ticks_per_load):
+                data_feed_dto: FeedData = self._next_feed_data()
+                if data_feed_dto is not None:
+                    break
+                if self.handoff is not None or all(
+                    feed.drained for feed in self.source_feeds
+                ):
+                    return self._on_idle()
+            else:
                 return None
 
-            if not self._check_session_range(data_feed_dto.datetime):
-                print("Not in session: ", data_feed_dto)
+            warmup = (
+                self.warmup_until_ns is not None
+                and data_feed_dto.tick_epoch_ns <= self.warmup_until_ns
+            )
+            if self.warmup_until_ns is not None and not warmup:
+                self._go_live()
+            # Warm-up history usually predates the session, it only primes
+            # indicators and is not held to session_time
+            if not warmup and not self._check_session_range(data_feed_dto.epoch_ns):
+                self.tick_logger.debug(
+                    "Not in session", extra={"fields": self._log_fields(data_feed_dto)}
+                )
                 return None
-            print("Data Feed: ", data_feed_dto)
+            self.tick_logger.info(
+                "Data Feed", extra={"fields": self._log_fields(data_feed_dto)}
+            )
 
             self.lines.datetime[0] = bt.date2num(data_feed_dto.datetime)
             self.lines.open[0] = self._round(data_feed_dto.open)
@@ -35,31 +102,154 @@ class InstrumentFeed(bt.DataBase):
             self.lines.close[0] = self._round(data_feed_dto.close)
             self.lines.volume[0] = self._round(data_feed_dto.volume)
             self.lines.openinterest[0] = 0
-            self.last_update = datetime.now()
-            # print("Last updated time: ", self.last_update)
+            if self.tick_to_bar_latency is not None:
+                # From the tick that completed the bar, not from the bar start
+                latency_ns = time.time_ns() - data_feed_dto.tick_epoch_ns
+                self.tick_to_bar_latency.observe(latency_ns)
+            self.idle_since = None
 
             return True
 
+        except EndOfSession as e:
+            logger.info("End of session: %s", e)
+            self.feed_helper.close()
+            return False
         except Exception as e:
-            print("Error occured in data feed: ", e, e.with_traceback())
+            logger.exception("Error occured in data feed: %s", e)
             return False
 
-    def _check_session_range(self, dt):
-        if self.session_time:
-            start_time_condition = True
-            end_time_condition = True
+    def start(self):
+        super().start()
+        if self.warmup_until_ns is not None:
+            # Same as backtrader's backfill, strategies see DELAYED bars
+            # until the handoff to live data
+            self.put_notification(self.DELAYED)
+
+    def stop(self):
+        # A runtime may still be driving the pipeline, it is closed on the
+        # end of session instead
+        if self.handoff is None:
+            self.feed_helper.close()
+
+    def _preload_warmup(self, warmups):
+        """Hand warm-up ticks to their source feeds ahead of the live queue.
 
-            if self.session_time.get("start_time"):
-                start_time_condition = (
-                    parser.parse(self.session_time.get("start_time")) <= dt
+        Bars completed by warm-up ticks go out under a DELAYED notification
+        and skip the session_time filter, the first bar after them, or the
+        first idle poll, notifies LIVE. Strategies should not trade before
+        LIVE.
+        """
+        for warmup in warmups:
+            feeds = [
+                feed
+                for feed in self.source_feeds
+                if hasattr(feed, "preload")
+                and warmup.get("feed_name", feed.name) == feed.name
+            ]
+            if len(feeds) != 1:
+                raise Exception(
+                    "Warm-up needs exactly one matching source feed, set feed_name"
                 )
-            if self.session_time.get("end_time"):
-                end_time_condition = (
-                    parser.parse(self.session_time.get("end_time")) >= dt
+
+            ticks = read_ticks(
+                warmup["source"],
+                warmup.get("epoch_column", "epoch"),
+                warmup.get("price_column", "ltp"),
+                warmup.get("volume_column"),
+            )
+            feeds[0].preload(ticks)
+            logger.info("Warm-up: %s ticks preloaded for %s", len(ticks), feeds[0].name)
+            if ticks:
+                until_ns = int(ticks[-1]["epoch"] * 1e9)
+                self.warmup_until_ns = max(self.warmup_until_ns or 0, until_ns)
+
+    def _go_live(self):
+        logger.info("Warm-up done, switching to live data")
+        self.warmup_until_ns = None
+        self.put_notification(self.LIVE)
+
+    def _on_idle(self):
+        if self.warmup_until_ns is not None and self.handoff is None:
+            # Idle sources have served every warm-up tick
+            self._go_live()
+        now = time.monotonic()
+        if self.idle_since is None:
+            self.idle_since = now
+            self.idle_sleep = self.min_idle_sleep
+            self.next_heartbeat = now + self.heartbeat_seconds
+
+        idle_for = now - self.idle_since
+        heartbeat = max(
+            (
+                feed.last_heartbeat
+                for feed in self.source_feeds
+                if feed.last_heartbeat is not None
+            ),
+            default=None,
+        )
+        # A producer heartbeat means quiet but alive, not gone
+        silent_for = idle_for
+        if heartbeat is not None and heartbeat > self.idle_since:
+            silent_for = now - heartbeat
+        if self.idle_timeout is not None and silent_for > self.idle_timeout:
+            logger.warning(
+                "No ticks or producer heartbeat for %.1fs, ending the session",
+                silent_for,
+            )
+            return False
+        if now >= self.next_heartbeat:
+            if heartbeat is None:
+                logger.info("Idle: no data for %.1fs, no producer heartbeat", idle_for)
+            else:
+                logger.info(
+                    "Idle: no data for %.1fs, last producer heartbeat %.1fs ago",
+                    idle_for,
+                    now - heartbeat,
                 )
-            return start_time_condition and end_time_condition
+            self.next_heartbeat = now + self.heartbeat_seconds
+
+        # The handoff wait already blocked, no need to sleep on top of it
+        if self.idle_mode == "BACKOFF" and self.handoff is None:
+            time.sleep(self.idle_sleep)
+            self.idle_sleep = min(self.idle_sleep * 2, self.max_idle_sleep)
+        return None
+
+    def _next_feed_data(self) -> FeedData:
+        if self.handoff is None and self.batch_mode:
+            if not self.pending_bars:
+                batch = self.feed_helper.next_batch()
+                if batch is None:
+                    return None
+                self.pending_bars.extend(batch.to_feed_datas())
+            return self.pending_bars.popleft()
+        if self.handoff is None:
+            return self.feed_helper.next()
+
+        try:
+            data_feed_dto = self.handoff.get(timeout=self.handoff_timeout)
+        except queue.Empty:
+            return None
+        if isinstance(data_feed_dto, Exception):
+            raise data_feed_dto
+        return data_feed_dto
+
+    def _check_session_range(self, epoch_ns):
+        if self.session_calendar:
+            return self.session_calendar.is_in_session(epoch_ns / 1e9)
         else:
             return False
 
+    def _log_fields(self, data_feed_dto: FeedData):
+        # Plain values, the record is formatted later on the listener thread
+        return {
+            "symbol": data_feed_dto.symbol,
+            "epoch_ns": data_feed_dto.epoch_ns,
+            "open": data_feed_dto.open,
+            "high": data_feed_dto.high,
+            "low": data_feed_dto.low,
+            "close": data_feed_dto.close,
+            "volume": data_feed_dto.volume,
+        }
+
     def _round(self, num, decimal_digit=2):
         return round(float(num), decimal_digit)
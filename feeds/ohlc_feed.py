@@ -1,21 +1,240 @@
-from feeds import BaseFeed, FeedData
+from feeds import BaseFeed, FeedData, FeedBatch, EndOfSession
 from utils.redis_queue import RedisQueue
-from datetime import datetime
+from utils.shm_ring_buffer import ShmTickRing
+from utils.metrics import get_registry
+from utils.tick_codec import END_OF_SESSION_EPOCH, HEARTBEAT_EPOCH
+from collections import deque
+import asyncio
+import numpy as np
+import time
 
 
 class OHLCQueueFeed(BaseFeed):
     def __init__(self, queue: RedisQueue, **configs):
         super().__init__(**configs)
         self.queue = queue
+        # batch_size > 1 drains the queue in chunks and serves ticks from memory
+        self.batch_size = configs.get("batch_size", 1)
+        # blocking mode waits inside Redis (BRPOP) instead of polling LLEN
+        self.blocking = configs.get("blocking", False)
+        self.block_timeout = configs.get("block_timeout", 1)
+        self.buffer = deque()
+        self.async_queue = None
+        self.warmup_pending = 0
+        self.warmup_until = None
+
+        if configs.get("metrics_enabled", False):
+            # Read at export time only, nothing is added to the tick path
+            get_registry().gauge(
+                "queue_depth", queue.size, queue=getattr(queue, "key", self.name)
+            )
 
     def next(self, data: FeedData) -> FeedData:
+        while True:
+            queue_data = self._next_queue_data()
+            self.drained = queue_data is None
+            if queue_data is None:
+                return None
+            if self._is_heartbeat(queue_data):
+                continue
+            if not self._is_duplicate(queue_data):
+                return self._to_feed_data(queue_data)
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        """Up to batch_rows queued ticks as one FeedBatch, no FeedData built"""
+        if self.end_pending:
+            raise EndOfSession(self.name)
+        ticks = []
+        while len(ticks) < self.batch_rows:
+            if ticks and not self.buffer:
+                # Only the first tick may be waited for, then take what is there
+                self.buffer.extend(self.queue.pop_many(self.batch_rows - len(ticks)))
+                if not self.buffer:
+                    break
+            queue_data = self._next_queue_data()
+            if queue_data is None:
+                break
+            if self._is_heartbeat(queue_data):
+                continue
+            if queue_data.get("eos"):
+                if not ticks:
+                    raise EndOfSession(self.name)
+                self.end_pending = True
+                break
+            if not self._is_duplicate(queue_data):
+                ticks.append(queue_data)
+
+        self.drained = not ticks
+        if not ticks:
+            return None
+        count = len(ticks)
+        epochs = np.fromiter((tick["epoch"] for tick in ticks), np.float64, count)
+        ltps = np.fromiter((float(tick["ltp"]) for tick in ticks), np.float64, count)
+        volumes = np.fromiter(
+            (tick.get("volume", 0) for tick in ticks), np.float64, count
+        )
+        return FeedBatch.from_ticks(
+            (epochs * 1e9).astype(np.int64), ltps.round(2), volumes, self.name
+        )
+
+    def _next_queue_data(self):
+        if self.buffer:
+            return self.buffer.popleft()
+        if self.blocking:
+            queue_data = self.queue.blocking_pop(self.block_timeout)
+            if queue_data is not None and self.batch_size > 1:
+                # Woken up by a tick, drain whatever else arrived along with it
+                self.buffer.extend(self.queue.pop_many(self.batch_size - 1))
+            return queue_data
+        if self.batch_size > 1:
+            self.buffer.extend(self.queue.pop_many(self.batch_size))
+            return self.buffer.popleft() if self.buffer else None
         if not self.queue.is_empty():
-            queue_data = self.queue.pop()
-            # print(queue_data)
-            dt = datetime.fromtimestamp(queue_data["epoch"])
-            ltp = round(float(queue_data["ltp"]), 2)
+            return self.queue.pop()
+        return None
+
+    async def next_async(self, data: FeedData) -> FeedData:
+        if not hasattr(self.queue, "as_async"):
+            # No asyncio client for this backend, keep the event loop free
+            return await asyncio.to_thread(self.next, data)
+
+        if self.async_queue is None:
+            self.async_queue = self.queue.as_async()
+
+        while True:
+            if not self.buffer and self.blocking:
+                queue_data = await self.async_queue.blocking_pop(self.block_timeout)
+                if queue_data is None:
+                    return None
+                self.buffer.append(queue_data)
+                if self.batch_size > 1:
+                    self.buffer.extend(
+                        await self.async_queue.pop_many(self.batch_size - 1)
+                    )
+            elif not self.buffer:
+                # The runtime sleeps between empty polls
+                self.buffer.extend(await self.async_queue.pop_many(self.batch_size))
+                if not self.buffer:
+                    return None
+            queue_data = self.buffer.popleft()
+            if self._is_heartbeat(queue_data):
+                continue
+            if not self._is_duplicate(queue_data):
+                return self._to_feed_data(queue_data)
+
+    async def close_async(self):
+        if self.async_queue is not None:
+            await self.async_queue.close()
+            self.async_queue = None
+
+    def preload(self, ticks):
+        """Serve warm-up ticks ahead of the queue.
+
+        Live ticks at or before the last warm-up epoch are skipped, so the
+        switch over to the queue has neither gaps nor duplicates as long as
+        the warm-up data overlaps the start of the queue.
+        """
+        if not ticks:
+            return
+        self.buffer.extendleft(reversed(ticks))
+        self.warmup_pending += len(ticks)
+        self.warmup_until = ticks[-1]["epoch"]
+
+    def _is_heartbeat(self, queue_data):
+        if queue_data.get("heartbeat"):
+            self.last_heartbeat = time.monotonic()
+            return True
+        return False
+
+    def _is_duplicate(self, queue_data):
+        if self.warmup_pending:
+            self.warmup_pending -= 1
+            return False
+        if self.warmup_until is None or queue_data.get("eos"):
+            return False
+        if queue_data["epoch"] <= self.warmup_until:
+            return True
+        self.warmup_until = None
+        return False
+
+    def source_feeds(self):
+        return [self]
+
+    def _to_feed_data(self, queue_data) -> FeedData:
+        if queue_data.get("eos"):
+            raise EndOfSession(self.name)
+        epoch_ns = int(queue_data["epoch"] * 1e9)
+        ltp = round(float(queue_data["ltp"]), 2)
+
+        volume = queue_data.get("volume", 0)
+
+        return FeedData(epoch_ns, ltp, ltp, ltp, ltp, volume, self.name)
+
+
+class ShmQueueFeed(BaseFeed):
+    """Reads ticks straight out of a shared-memory ring, no deserialization"""
+
+    def __init__(self, ring: ShmTickRing, **configs):
+        super().__init__(**configs)
+        self.ring = ring
+        self.batch_size = configs.get("batch_size", 1000)
+        self.buffer = deque()
+
+    def next(self, data: FeedData) -> FeedData:
+        while True:
+            if not self.buffer:
+                self.buffer.extend(self.ring.read(self.batch_size).tolist())
+                self.drained = not self.buffer
+                if not self.buffer:
+                    return None
+
+            epoch, ltp, volume = self.buffer.popleft()
+            if epoch != HEARTBEAT_EPOCH:
+                break
+            self.last_heartbeat = time.monotonic()
+        if epoch == END_OF_SESSION_EPOCH:
+            raise EndOfSession(self.name)
+        ltp = round(ltp, 2)
+        return FeedData(int(epoch * 1e9), ltp, ltp, ltp, ltp, volume, self.name)
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        if self.buffer:
+            # Finish what next already took out of the ring first
+            return super().next_batch(batch)
+        if self.end_pending:
+            raise EndOfSession(self.name)
+
+        ticks = self.ring.read(self.batch_rows)
+        heartbeats = ticks["epoch"] == HEARTBEAT_EPOCH
+        if heartbeats.any():
+            self.last_heartbeat = time.monotonic()
+            ticks = ticks[~heartbeats]
+        end = np.flatnonzero(ticks["epoch"] == END_OF_SESSION_EPOCH)
+        if len(end):
+            if end[0] == 0:
+                raise EndOfSession(self.name)
+            ticks = ticks[: end[0]]
+            self.end_pending = True
+        self.drained = not len(ticks)
+        if not len(ticks):
+            return None
+        # Contiguous columns out of the copied records
+        return FeedBatch.from_ticks(
+            (ticks["epoch"] * 1e9).astype(np.int64),
+            ticks["ltp"].round(2),
+            ticks["volume"].copy(),
+            self.name,
+        )
+
+    def source_feeds(self):
+        return [self]
 
-            return FeedData(dt, ltp, ltp, ltp, ltp, 0, self.name)
+    def close(self):
+        # Reads copy out of the ring, nothing else holds its mapping. Called
+        # on the end of session and again when backtrader stops.
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
 
 
 class OHLCDataBaseFeed(BaseFeed):
@@ -1,5 +1,7 @@
-from feeds import BaseFeed, FeedData
+from feeds import BaseFeed, FeedData, FeedBatch
 from typing import List
+from time import perf_counter_ns
+from utils.metrics import get_registry
 
 
 class PipelineFeed(BaseFeed):
@@ -12,16 +14,62 @@ class PipelineFeed(BaseFeed):
         for sub_feed_config in sub_feed_configs:
             self.feeds.append(FeedHelper(**sub_feed_config).feed)
 
+        self.stage_latencies = None
+        if configs.get("metrics_enabled", False):
+            registry = get_registry()
+            self.stage_latencies = [
+                registry.histogram(
+                    "feed_stage_latency_seconds", pipeline=self.name, stage=feed.name
+                )
+                for feed in self.feeds
+            ]
+
     def next(self, data: FeedData) -> FeedData:
+        if self.stage_latencies is not None:
+            return self._timed_next(data)
+
         derived_feed_data = data
-        # print("Pipeline Data: ", data)
-        # start_time = datetime.now()
         for feed in self.feeds:
             derived_feed_data = feed.next(derived_feed_data)
             if derived_feed_data is None:
                 return None
-        # print(
-        #     "Time taken to process the pipeline: ",
-        #     (datetime.now().timestamp() - start_time.timestamp()) * 1000,
-        # )
+        return derived_feed_data
+
+    def _timed_next(self, data: FeedData) -> FeedData:
+        derived_feed_data = data
+        start = perf_counter_ns()
+        for feed, latency in zip(self.feeds, self.stage_latencies):
+            derived_feed_data = feed.next(derived_feed_data)
+            end = perf_counter_ns()
+            latency.observe(end - start)
+            start = end
+            if derived_feed_data is None:
+                return None
+        return derived_feed_data
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        start = perf_counter_ns()
+        for index, feed in enumerate(self.feeds):
+            batch = feed.next_batch(batch)
+            if self.stage_latencies is not None:
+                end = perf_counter_ns()
+                self.stage_latencies[index].observe(end - start)
+                start = end
+            if batch is None:
+                return None
+        return batch
+
+    def source_feeds(self):
+        return self.feeds[0].source_feeds() if self.feeds else []
+
+    def close(self):
+        for feed in self.feeds:
+            feed.close()
+
+    async def next_async(self, data: FeedData) -> FeedData:
+        derived_feed_data = data
+        for feed in self.feeds:
+            derived_feed_data = await feed.next_async(derived_feed_data)
+            if derived_feed_data is None:
+                return None
         return derived_feed_data
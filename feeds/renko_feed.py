@@ -3,10 +3,16 @@ from utils.renko_util import Renko
 
 
 class RenkoFeed(BaseFeed):
-    def __init__(self, brick_size=None, brick_sizer=None, **configs):
+    def __init__(
+        self, brick_size=None, brick_sizer=None, brick_size_pct=None, **configs
+    ):
         super().__init__(**configs)
         if isinstance(brick_sizer, str):
             brick_sizer = eval(brick_sizer)
+        if brick_size_pct is not None:
+            # Plain number so it can be swept like any other parameter
+            def brick_sizer(close, bricks):
+                return close * brick_size_pct / 100
 
         self.renko = Renko(
             brick_size=brick_size, brick_calc=brick_sizer, multi_brick=False
@@ -20,11 +26,12 @@ class RenkoFeed(BaseFeed):
             last_brick = self.renko.bricks[-1]
 
             return FeedData(
-                data.datetime,
+                data.epoch_ns,
                 last_brick.open,
                 last_brick.high,
                 last_brick.low,
                 last_brick.close,
                 0,
                 self.name,
+                data.tick_epoch_ns,
             )
@@ -0,0 +1,140 @@
+from feeds import BaseFeed, FeedData, FeedBatch, EndOfSession
+from utils.queue_loader import dataframe_to_arrays
+from utils.shm_ring_buffer import ShmTickSeries
+from utils.log_util import get_logger
+import numpy as np
+import time
+
+logger = get_logger("feeds.replay")
+
+
+class ArrayReplayFeed(BaseFeed):
+    """Source feed replaying in-memory tick arrays, no queue in between.
+
+    data is a DataFrame (mapped with epoch_column/price_column/volume_column)
+    or a dict of "epoch", "ltp" and optional "volume" arrays. shm_series
+    instead names a ShmTickSeries to read in place. speed is "MAX"
+    to replay as fast as the pipeline goes, "REALTIME", or a multiplier of
+    real time, e.g. 10.
+    """
+
+    # Everything is in memory, a None from the pipeline is never a wait
+    drained = False
+
+    def __init__(self, **configs):
+        super().__init__(**configs)
+        self.chunk_size = configs.get("chunk_size", 10000)
+        speed = configs.get("speed", "MAX")
+        if speed == "MAX":
+            self.speed = None
+        elif speed == "REALTIME":
+            self.speed = 1.0
+        else:
+            self.speed = float(speed)
+        self.replay_start = None
+
+        self.columns = ((), (), ())
+        self.offset = 0
+        self.chunk = iter(())
+        self.columns_iter = self._columns_iter(configs)
+
+    def next(self, data: FeedData) -> FeedData:
+        tick = next(self.chunk, None)
+        while tick is None:
+            self._next_chunk()
+            tick = next(self.chunk, None)
+
+        epoch_ns, ltp, volume = tick
+        if self.speed is not None:
+            self._pace(epoch_ns / 1e9)
+        return FeedData(epoch_ns, ltp, ltp, ltp, ltp, volume, self.name)
+
+    def source_feeds(self):
+        return [self]
+
+    def close(self):
+        series = getattr(self, "series", None)
+        if series is None:
+            return
+        # Drop the views into the series before unmapping it
+        self.series = None
+        self.columns_iter.close()
+        self.columns = ((), (), ())
+        self.chunk = iter(())
+        try:
+            series.close()
+        except BufferError:
+            # Batches handed out are views too, the mapping goes with them
+            logger.warning("Shared series of %s still in use, left mapped", self.name)
+
+    def _columns_iter(self, configs):
+        """Yields epoch, ltp and volume arrays, one tuple per data segment"""
+        if "shm_series" in configs:
+            # Kept on the feed, the columns are views into its buffer
+            self.series = ShmTickSeries(configs["shm_series"])
+            data = self.series.columns()
+        else:
+            data = configs["data"]
+        if isinstance(data, dict):
+            epochs = np.asarray(data["epoch"], dtype="float64")
+            ltps = np.asarray(data["ltp"], dtype="float64")
+            volumes = data.get("volume")
+        else:
+            epochs, ltps, volumes = dataframe_to_arrays(
+                data,
+                configs.get("epoch_column", "epoch"),
+                configs.get("price_column", "ltp"),
+                configs.get("volume_column"),
+            )
+        if volumes is None:
+            volumes = np.zeros(len(epochs))
+        yield epochs, ltps, np.asarray(volumes, dtype="float64")
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        if self.speed is not None:
+            # Paced replay goes tick by tick
+            return super().next_batch(batch)
+        rest = list(self.chunk)
+        if rest:
+            # Ticks next already converted, hand them out first
+            self.chunk = iter(())
+            epochs, ltps, volumes = (np.array(column) for column in zip(*rest))
+            return FeedBatch.from_ticks(epochs, ltps, volumes, self.name)
+
+        epochs, ltps, volumes = self._next_slice(self.batch_rows)
+        while not len(epochs):
+            epochs, ltps, volumes = self._next_slice(self.batch_rows)
+        return FeedBatch.from_ticks(
+            (epochs * 1e9).astype(np.int64), np.round(ltps, 2), volumes, self.name
+        )
+
+    def _next_chunk(self):
+        # Only the current chunk is turned into Python numbers
+        epochs, ltps, volumes = self._next_slice(self.chunk_size)
+        # Epoch nanoseconds for FeedData, converted once per chunk
+        epochs = (epochs * 1e9).astype(np.int64).tolist()
+        # Prices rounded to 2 decimals like the queue feeds
+        self.chunk = zip(epochs, np.round(ltps, 2).tolist(), volumes.tolist())
+
+    def _next_slice(self, count):
+        if self.offset >= len(self.columns[0]):
+            self.columns = next(self.columns_iter, None)
+            if self.columns is None:
+                self.columns = ((), (), ())
+                raise EndOfSession(self.name)
+            self.offset = 0
+
+        end = self.offset + count
+        epochs, ltps, volumes = (column[self.offset : end] for column in self.columns)
+        self.offset = end
+        return epochs, ltps, volumes
+
+    def _pace(self, epoch):
+        now = time.monotonic()
+        if self.replay_start is None:
+            self.replay_start = (now, epoch)
+            return
+        wall_start, epoch_start = self.replay_start
+        delay = wall_start + (epoch - epoch_start) / self.speed - now
+        if delay > 0:
+            time.sleep(delay)
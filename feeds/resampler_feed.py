@@ -1,6 +1,6 @@
-from feeds import BaseFeed, FeedData
+from feeds import BaseFeed, FeedData, FeedBatch
 from utils.resampler_util import DataResampler
-from datetime import datetime
+import numpy as np
 
 
 class ResampleFeed(BaseFeed):
@@ -8,8 +8,13 @@ class ResampleFeed(BaseFeed):
         super().__init__(**configs)
         self.time_frame_in_seconds = configs.get("time_frame_in_seconds", 5)
 
-        self.sampler = DataResampler(timeframe_seconds=self.time_frame_in_seconds)
-        self.prev_bar = None
+        self.sampler = DataResampler(
+            timeframe_seconds=self.time_frame_in_seconds,
+            history_size=configs.get("history_size", 1000),
+            utc_offset_seconds=configs.get("utc_offset_seconds"),
+        )
+        # Start of the last bar sent out
+        self.prev_timestamp = None
         self.completed_bars_only = configs.get("completed_bars_only", True)
 
     def next(self, data: FeedData) -> FeedData:
@@ -25,14 +30,46 @@ class ResampleFeed(BaseFeed):
             # print("No bar found")
             return None
 
-        if not self.prev_bar or (self.prev_bar.get("timestamp") < bar.get("timestamp")):
-            self.prev_bar = bar
+        if self.prev_timestamp is None or self.prev_timestamp < bar.timestamp:
+            self.prev_timestamp = bar.timestamp
             return FeedData(
-                bar["timestamp"],
-                bar["open"],
-                bar["high"],
-                bar["low"],
-                bar["close"],
-                0,
+                bar.timestamp,
+                bar.open,
+                bar.high,
+                bar.low,
+                bar.close,
+                bar.volume,
                 self.name,
+                data.tick_epoch_ns,
             )
+
+    def next_batch(self, batch: FeedBatch) -> FeedBatch:
+        if batch is None or not self.completed_bars_only:
+            # Open bars are emitted on every tick, nothing to vectorize
+            return super().next_batch(batch)
+
+        completed = self.sampler.update_batch(
+            batch.epoch_ns, batch.close, batch.volume
+        )
+        if completed is None or not len(completed[0]):
+            return None
+        starts, opens, highs, lows, closes, volumes, closing = completed
+
+        # Same rule as next, a bar only goes out if it is newer than any
+        # bar that went out before it
+        prev_start = -1 if self.prev_timestamp is None else self.prev_timestamp
+        newest = np.maximum.accumulate(np.concatenate(([prev_start], starts)))[:-1]
+        keep = starts > newest
+        if not keep.any():
+            return None
+        self.prev_timestamp = int(starts[keep][-1])
+        return FeedBatch(
+            starts[keep],
+            opens[keep],
+            highs[keep],
+            lows[keep],
+            closes[keep],
+            volumes[keep],
+            self.name,
+            batch.tick_epoch_ns[closing][keep],
+        )
@@ -1,11 +1,12 @@
 from feeds.instrument_feed import InstrumentFeed
 from util.data_loader import get_historical_data
-from threading import Thread
 from utils.redis_queue import RedisQueue
+from utils.queue_loader import QueueLoader
+from utils.session_calendar import SessionCalendar
+from utils.log_util import setup_logging
 from dotenv import load_dotenv
 import pandas as pd
 import backtrader as bt
-import time
 from strategies.supertrend_strategy import SuperTrendStrategy
 from manager.strategy_manager import StrategyManager
 from math import log
@@ -13,6 +14,7 @@ from broker.fyers_broker import FyersBroker
 import os
 
 load_dotenv(override=True)
+setup_logging()
 
 
 initial_value = 500000
@@ -33,10 +35,11 @@ def brick_sizer(close, bricks):
 
 start_time = "2025-04-21 09:00"
 end_time = "2025-04-21 16:00"
+session_calendar = SessionCalendar(start_time=start_time, end_time=end_time)
 bot_manager = {
     "feed_details": {
         "name": "NSE:CIPLA-EQ",
-        "session_time": {"start_time": start_time, "end_time": end_time},
+        "session_time": session_calendar,
         "feed_type": "PIPELINE_FEED",
         "pipeline_feed_config": {
             "feed_name": "renko_pipeline",
@@ -64,35 +67,36 @@ bot_manager = {
     "strayegy_details": {
         "entry_time": {"start_time": start_time, "end_time": end_time},
         "strategy_stop_time": end_time,
+        "session_calendar": session_calendar,
     },
 }
 
 
-def thread_relead_data(ticker_df: pd.DataFrame, symbol: str):
-    data_queue = RedisQueue(name=symbol)
-    data_queue.remove_all()
-    print("Removed all previous data", symbol)
-
-    for idx in range(ticker_df.shape[0]):
-        # time.sleep(1)
-
-        d = {}
-        d["epoch"] = ticker_df.iloc[idx, 5].timestamp()
-        d["ltp"] = float(ticker_df.iloc[idx, 3])
-        # print(d)
-
-        data_queue.push(d)
-    print("Data loading completed: ", symbol)
+def thread_relead_data(ticker_df: pd.DataFrame, symbol: str) -> QueueLoader:
+    loader = QueueLoader(
+        RedisQueue(name=symbol),
+        ticker_df,
+        epoch_column=5,
+        price_column=3,
+        end_of_session=True,
+        progress_callback=lambda loaded, total: print(
+            f"Loaded {loaded}/{total} ticks: {symbol}"
+        ),
+    )
+    return loader.start()
 
 
+loaders = []
 for symbol in ["NSE:CIPLA-EQ"]:
     df = get_historical_data(
         symbol, "5S", "2025-04-21 09:00", "2025-04-21 16:00", False
     )
 
-    thread = Thread(target=thread_relead_data, args=(df, symbol))
-    thread.start()
-time.sleep(5)
+    loaders.append(thread_relead_data(df, symbol))
+
+for loader in loaders:
+    loader.wait()
+print("Data loading completed")
 
 feed = InstrumentFeed(
     **bot_manager["feed_details"], timeframe=bt.TimeFrame.Seconds, compression=1
@@ -0,0 +1,48 @@
+from importlib import import_module
+
+import backtrader as bt
+
+from feeds.instrument_feed import InstrumentFeed
+from manager.strategy_manager import StrategyManager
+
+
+def load_object(path):
+    """Resolve "package.module.Name" to the object it names"""
+    module_name, _, attribute = path.rpartition(".")
+    return getattr(import_module(module_name), attribute)
+
+
+def build_cerebro(bot_definition) -> bt.Cerebro:
+    """Build a Cerebro run from a bot definition.
+
+    A definition holds the same "feed_details" and "strategy_details" as the
+    bot_manager in main.py, plus the strategy class as an import path in
+    "strategy", its "strategy_params" and the sizer "stake".
+    """
+    cerebro = bt.Cerebro()
+
+    feed = InstrumentFeed(
+        **dict(bot_definition["feed_details"]),
+        timeframe=bt.TimeFrame.Seconds,
+        compression=1,
+    )
+    cerebro.adddata(feed)
+
+    strategy = bot_definition["strategy"]
+    if isinstance(strategy, str):
+        strategy = load_object(strategy)
+    strategy_details = bot_definition.get(
+        "strategy_details", bot_definition.get("strayegy_details", {})
+    )
+    cerebro.addstrategy(
+        strategy=strategy,
+        strategy_manager=StrategyManager(**strategy_details),
+        **bot_definition.get("strategy_params", {}),
+    )
+    cerebro.addsizer(sizercls=bt.sizers.FixedSize, stake=bot_definition.get("stake", 1))
+    return cerebro
+
+
+def run_bot(bot_definition):
+    cerebro = build_cerebro(bot_definition)
+    return cerebro.run(live=bot_definition.get("live", True), stdstats=True)
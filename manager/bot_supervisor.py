@@ -0,0 +1,178 @@
+import json
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import traceback
+
+from utils.log_util import get_logger, setup_logging
+
+logger = get_logger("manager.supervisor")
+
+
+def load_bot_definitions(path):
+    """Bot definitions from a JSON file holding a list of definitions"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def _worker_main(slot, bot_definitions, status_queue):
+    from manager.bot_runner import run_bot
+
+    setup_logging()
+
+    def run(bot_definition):
+        name = bot_definition["name"]
+        status_queue.put((slot, name, "RUNNING", None))
+        try:
+            run_bot(bot_definition)
+            status_queue.put((slot, name, "COMPLETED", None))
+        except Exception:
+            status_queue.put((slot, name, "FAILED", traceback.format_exc()))
+
+    # Bots of one worker share its process, the pool spreads them over cores
+    threads = [
+        threading.Thread(target=run, args=(bot_definition,), daemon=True)
+        for bot_definition in bot_definitions
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+class BotSupervisor:
+    """Runs bot definitions on a pool of worker processes.
+
+    Bots are spread round-robin over workers, one per CPU by default, and
+    each worker runs its bots in threads. A worker that dies is restarted
+    with the bots it had not completed, up to max_restarts times. Status
+    events from all workers are gathered into one status table.
+    """
+
+    def __init__(self, bot_definitions, workers=None, max_restarts=3, poll_interval=1):
+        self.bot_definitions = {}
+        for bot_definition in bot_definitions:
+            name = bot_definition["name"]
+            # Status is tracked by name, a duplicate would silently replace
+            if name in self.bot_definitions:
+                raise Exception(f"Duplicate bot name: {name}")
+            self.bot_definitions[name] = bot_definition
+        self.workers = min(workers or os.cpu_count() or 1, len(self.bot_definitions))
+        self.max_restarts = max_restarts
+        self.poll_interval = poll_interval
+
+        self.status_queue = multiprocessing.Queue()
+        self.processes = {}
+        self.restarts = {}
+        self.slot_bots = {slot: [] for slot in range(self.workers)}
+        for index, name in enumerate(self.bot_definitions):
+            self.slot_bots[index % self.workers].append(name)
+        self.bot_status = {
+            name: {"status": "PENDING", "worker": None, "error": None}
+            for name in self.bot_definitions
+        }
+
+    def start(self):
+        for slot in self.slot_bots:
+            self.restarts[slot] = 0
+            self._start_worker(slot)
+
+    def run(self):
+        """Start the workers and supervise them until every bot is done"""
+        self.start()
+        while self.processes:
+            time.sleep(self.poll_interval)
+            self.poll()
+        return self.status()
+
+    def poll(self):
+        self._drain_status()
+        for slot, process in list(self.processes.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            del self.processes[slot]
+            self._drain_status()
+
+            pending = [
+                name
+                for name in self.slot_bots[slot]
+                if self.bot_status[name]["status"] in ("PENDING", "RUNNING")
+            ]
+            if process.exitcode == 0 or not pending:
+                continue
+
+            if self.restarts[slot] < self.max_restarts:
+                self.restarts[slot] += 1
+                logger.warning(
+                    "Worker %s exited with %s, restarting (%s/%s)",
+                    slot,
+                    process.exitcode,
+                    self.restarts[slot],
+                    self.max_restarts,
+                )
+                self.slot_bots[slot] = pending
+                self._start_worker(slot)
+            else:
+                logger.error(
+                    "Worker %s gave up after %s restarts", slot, self.restarts[slot]
+                )
+                for name in pending:
+                    self.bot_status[name].update(
+                        status="FAILED", error=f"worker exit code {process.exitcode}"
+                    )
+
+    def status(self):
+        self._drain_status()
+        return {
+            "workers": {
+                slot: {
+                    "alive": slot in self.processes and self.processes[slot].is_alive(),
+                    "restarts": self.restarts.get(slot, 0),
+                    "bots": list(bots),
+                }
+                for slot, bots in self.slot_bots.items()
+            },
+            "bots": {name: dict(status) for name, status in self.bot_status.items()},
+        }
+
+    def stop(self):
+        for process in self.processes.values():
+            process.terminate()
+        for process in self.processes.values():
+            process.join()
+        self.processes = {}
+
+    def _start_worker(self, slot):
+        process = multiprocessing.Process(
+            target=_worker_main,
+            args=(
+                slot,
+                [self.bot_definitions[name] for name in self.slot_bots[slot]],
+                self.status_queue,
+            ),
+            name=f"bot-worker-{slot}",
+            daemon=False,
+        )
+        process.start()
+        self.processes[slot] = process
+
+    def _drain_status(self):
+        while True:
+            try:
+                slot, name, status, error = self.status_queue.get_nowait()
+            except queue.Empty:
+                return
+            self.bot_status[name].update(status=status, worker=slot, error=error)
+            if status == "FAILED":
+                logger.error("Bot %s failed on worker %s: %s", name, slot, error)
+
+
+if __name__ == "__main__":
+    import sys
+
+    setup_logging()
+    supervisor = BotSupervisor(load_bot_definitions(sys.argv[1]))
+    print(json.dumps(supervisor.run(), indent=2, default=str))
@@ -0,0 +1,187 @@
+import copy
+import itertools
+import os
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import backtrader as bt
+import pandas as pd
+
+from manager.bot_runner import build_cerebro
+from utils.log_util import get_logger
+from utils.queue_loader import dataframe_to_arrays
+from utils.shm_ring_buffer import ShmTickSeries
+
+logger = get_logger("manager.sweep")
+
+
+def expand_grid(param_grid):
+    """Every combination of a {path: [values]} grid, as {path: value} dicts"""
+    paths = list(param_grid)
+    return [
+        dict(zip(paths, values))
+        for values in itertools.product(*(param_grid[path] for path in paths))
+    ]
+
+
+# Parents a bot definition may leave out, set_path creates them on demand
+OPTIONAL_PARENTS = ("strategy_params",)
+
+
+def set_path(definition, path, value):
+    """Set a dotted path, list items are addressed by their index.
+
+    Only the optional parents (strategy_params) may be missing, any other
+    missing key or index raises KeyError so a typo in the grid fails loudly.
+    """
+    *parents, key = path.split(".")
+    optional = len(parents) == 1 and parents[0] in OPTIONAL_PARENTS
+    target = definition
+    for part in parents:
+        if optional:
+            target = target.setdefault(part, {})
+        else:
+            target = _child(target, part, path)
+    if not optional:
+        _child(target, key, path)
+    if isinstance(target, list):
+        target[int(key)] = value
+    else:
+        target[key] = value
+
+
+def _child(target, part, path):
+    try:
+        if isinstance(target, list):
+            return target[int(part)]
+        return target[part]
+    except (IndexError, KeyError, TypeError, ValueError):
+        raise KeyError(f"{path}: no {part!r} in the bot definition") from None
+
+
+def validate_grid(definition, param_grid):
+    """Raise KeyError for a grid path that does not exist in the definition"""
+    definition = copy.deepcopy(definition)
+    for path in param_grid:
+        set_path(definition, path, None)
+
+
+def run_combination(bot_definition, params):
+    result = dict(params)
+    started = time.perf_counter()
+    try:
+        definition = copy.deepcopy(bot_definition)
+        for path, value in params.items():
+            set_path(definition, path, value)
+
+        cerebro = build_cerebro(definition)
+        cerebro.broker.set_cash(definition.get("cash", 100000))
+        cerebro.addanalyzer(bt.analyzers.TradeAnalyzer, _name="trades")
+        cerebro.addanalyzer(bt.analyzers.DrawDown, _name="drawdown")
+        # Preloading stops at the first None from _load, which InstrumentFeed
+        # returns for ticks outside the session and ticks not making a bar
+        strategy = cerebro.run(live=False, preload=False, stdstats=False)[0]
+
+        trades = strategy.analyzers.trades.get_analysis()
+        drawdown = strategy.analyzers.drawdown.get_analysis()
+        result.update(
+            final_value=cerebro.broker.getvalue(),
+            pnl=cerebro.broker.getvalue() - cerebro.broker.startingcash,
+            trades=trades.get("total", {}).get("closed", 0),
+            won=trades.get("won", {}).get("total", 0),
+            lost=trades.get("lost", {}).get("total", 0),
+            max_drawdown=drawdown.get("max", {}).get("drawdown", 0.0),
+            error=None,
+        )
+    except Exception:
+        result["error"] = traceback.format_exc()
+    result["seconds"] = time.perf_counter() - started
+    return result
+
+
+class ParameterSweep:
+    """Runs one bot definition over a parameter grid on a process pool.
+
+    Every symbol series is published once with add_series into shared
+    memory. ARRAY_REPLAY_FEED stages of the definition that carry a "symbol"
+    and no "data" are bound to that series, so the runs replay it in place
+    without Redis. param_grid maps dotted paths into the definition to the
+    values to try, e.g. {"strategy_params.multiplier": [1, 2, 3]}.
+
+    The shared memory series are released by close, or on leaving a with
+    block:
+
+        with ParameterSweep(definition, grid) as sweep:
+            sweep.add_series("NIFTY", ticks)
+            table = sweep.run()
+    """
+
+    def __init__(self, bot_definition, param_grid, workers=None):
+        self.bot_definition = bot_definition
+        self.param_grid = param_grid
+        self.workers = workers or os.cpu_count()
+        self.series = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add_series(
+        self, symbol, data, epoch_column="epoch", price_column="ltp", volume_column=None
+    ):
+        if isinstance(data, dict):
+            epochs, prices, volumes = data["epoch"], data["ltp"], data.get("volume")
+        else:
+            epochs, prices, volumes = dataframe_to_arrays(
+                data, epoch_column, price_column, volume_column
+            )
+        name = f"sweep_{os.getpid()}_{len(self.series)}"
+        self.series[symbol] = ShmTickSeries.from_arrays(name, epochs, prices, volumes)
+
+    def run(self, sort_by="pnl", ascending=False) -> pd.DataFrame:
+        definition = copy.deepcopy(self.bot_definition)
+        self._bind_series(definition["feed_details"])
+        validate_grid(definition, self.param_grid)
+        combinations = expand_grid(self.param_grid)
+        logger.info(
+            "Sweeping %s combinations on %s workers", len(combinations), self.workers
+        )
+
+        results = []
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = [
+                executor.submit(run_combination, definition, params)
+                for params in combinations
+            ]
+            for future in as_completed(futures):
+                result = future.result()
+                if result["error"]:
+                    logger.error("Sweep run failed: %s", result["error"])
+                results.append(result)
+
+        table = pd.DataFrame(results)
+        if sort_by in table:
+            table = table.sort_values(sort_by, ascending=ascending, ignore_index=True)
+        return table
+
+    def close(self):
+        for series in self.series.values():
+            series.close()
+        self.series = {}
+
+    def _bind_series(self, config):
+        if isinstance(config, list):
+            for item in config:
+                self._bind_series(item)
+        elif isinstance(config, dict):
+            if (
+                config.get("feed_type") == "ARRAY_REPLAY_FEED"
+                and "data" not in config
+                and config.get("symbol") in self.series
+            ):
+                config["shm_series"] = self.series[config.pop("symbol")].name
+            for value in config.values():
+                self._bind_series(value)
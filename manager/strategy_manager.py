@@ -1,16 +1,29 @@
 from backtrader import Strategy
 from dateutil.parser import parse
 import backtrader as bt
+from utils.session_calendar import SessionCalendar
+from utils.log_util import get_logger
+
+logger = get_logger("manager")
 
 
 class StrategyManager:
     def __init__(self, **config):
         self.position_type = config.get("position_type", "LONG")
-        print("Position type: ", self.position_type)
+        logger.info("Position type: %s", self.position_type)
         self.order_details_by_data_name = config.get(
             "order_details_by_data_name", dict()
         )
         self.strategy_stop_time = config.get("strategy_stop_time")
+        # Parsed once, backtrader hands us datetimes as date numbers
+        self.strategy_stop_num = (
+            bt.date2num(parse(self.strategy_stop_time))
+            if self.strategy_stop_time
+            else None
+        )
+        self.session_calendar = SessionCalendar.from_config(
+            config.get("session_calendar")
+        )
         self.long_positions = {}
         self.short_positions = {}
 
@@ -83,19 +96,12 @@ class StrategyManager:
             self.short_positions[name] = True
 
     def check_strategy_stop_time(self, dt):
-        if self.strategy_stop_time:
-            return parse(self.strategy_stop_time) < bt.num2date(dt)
+        if self.strategy_stop_num is not None:
+            return self.strategy_stop_num < dt
         return False
 
     def _check_session_range(self, dt):
-        if self.session_time:
-            start_time_condition = True
-            end_time_condition = True
-
-            if self.session_time.get("start_time"):
-                start_time_condition = parse(self.session_time.get("start_time")) <= dt
-            if self.session_time.get("end_time"):
-                end_time_condition = parse(self.session_time.get("end_time")) >= dt
-            return start_time_condition and end_time_condition
+        if self.session_calendar:
+            return self.session_calendar.is_in_session(dt.timestamp())
         else:
             return False
@@ -1,70 +1,181 @@
 from datetime import datetime
-from dataclasses import dataclass
+
+import numpy as np
 
 
-@dataclass
 class FeedData:
-    datetime: datetime
-    open: float
-    high: float
-    low: float
-    close: float
-    volume: float
-    symbol: str
+    """One tick or bar.
+
+    Time is kept as integer epoch nanoseconds and only turned into a datetime
+    on request, the in-place operators and add_scaled let aggregating stages
+    accumulate into one instance instead of allocating one per operation.
+    """
+
+    __slots__ = (
+        "epoch_ns",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "symbol",
+        "tick_epoch_ns",
+    )
+
+    def __init__(
+        self,
+        epoch_ns: int,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        symbol: str,
+        tick_epoch_ns: int = None,
+    ):
+        self.epoch_ns = epoch_ns
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.symbol = symbol
+        # Epoch of the tick this row came out of, bars are stamped with their
+        # start but go out when a later tick completes them
+        self.tick_epoch_ns = epoch_ns if tick_epoch_ns is None else tick_epoch_ns
+
+    @classmethod
+    def from_datetime(cls, dt: datetime, open, high, low, close, volume, symbol):
+        return cls(int(dt.timestamp() * 1e9), open, high, low, close, volume, symbol)
+
+    @property
+    def epoch(self) -> float:
+        return self.epoch_ns / 1e9
+
+    @property
+    def datetime(self) -> datetime:
+        # Local naive time, same as datetime.fromtimestamp on the tick epoch
+        return datetime.fromtimestamp(self.epoch_ns / 1e9)
+
+    def copy(self):
+        return FeedData(
+            self.epoch_ns,
+            self.open,
+            self.high,
+            self.low,
+            self.close,
+            self.volume,
+            self.symbol,
+            self.tick_epoch_ns,
+        )
 
     # Arithmetic operators
     def __add__(self, other):
         if isinstance(other, FeedData):
             return FeedData(
-                self.datetime,
+                self.epoch_ns,
                 self.open + other.open,
                 self.high + other.high,
                 self.low + other.low,
                 self.close + other.close,
                 self.volume + other.volume,
                 self.symbol,
+                self.tick_epoch_ns,
             )
         return NotImplemented
 
     def __sub__(self, other):
         if isinstance(other, FeedData):
             return FeedData(
-                self.datetime,
+                self.epoch_ns,
                 self.open - other.open,
                 self.high - other.high,
                 self.low - other.low,
                 self.close - other.close,
                 self.volume - other.volume,
                 self.symbol,
+                self.tick_epoch_ns,
             )
         return NotImplemented
 
     def __mul__(self, scalar):
         if isinstance(scalar, (int, float)):
             return FeedData(
-                self.datetime,
+                self.epoch_ns,
                 self.open * scalar,
                 self.high * scalar,
                 self.low * scalar,
                 self.close * scalar,
                 self.volume * scalar,
                 self.symbol,
+                self.tick_epoch_ns,
             )
         return NotImplemented
 
     def __truediv__(self, scalar):
         if isinstance(scalar, (int, float)):
             return FeedData(
-                self.datetime,
+                self.epoch_ns,
                 self.open / scalar,
                 self.high / scalar,
                 self.low / scalar,
                 self.close / scalar,
                 self.volume / scalar,
                 self.symbol,
+                self.tick_epoch_ns,
             )
         return NotImplemented
 
+    # In-place arithmetic operators, these mutate self
+    def __iadd__(self, other):
+        if isinstance(other, FeedData):
+            self.open += other.open
+            self.high += other.high
+            self.low += other.low
+            self.close += other.close
+            self.volume += other.volume
+            return self
+        return NotImplemented
+
+    def __isub__(self, other):
+        if isinstance(other, FeedData):
+            self.open -= other.open
+            self.high -= other.high
+            self.low -= other.low
+            self.close -= other.close
+            self.volume -= other.volume
+            return self
+        return NotImplemented
+
+    def __imul__(self, scalar):
+        if isinstance(scalar, (int, float)):
+            self.open *= scalar
+            self.high *= scalar
+            self.low *= scalar
+            self.close *= scalar
+            self.volume *= scalar
+            return self
+        return NotImplemented
+
+    def __itruediv__(self, scalar):
+        if isinstance(scalar, (int, float)):
+            self.open /= scalar
+            self.high /= scalar
+            self.low /= scalar
+            self.close /= scalar
+            self.volume /= scalar
+            return self
+        return NotImplemented
+
+    def add_scaled(self, other, scalar):
+        """self += other * scalar in place, other is left untouched"""
+        self.open += other.open * scalar
+        self.high += other.high * scalar
+        self.low += other.low * scalar
+        self.close += other.close * scalar
+        self.volume += other.volume * scalar
+        return self
+
     # Reverse arithmetic operators
     def __radd__(self, other):
         return self.__add__(other)
@@ -80,32 +191,34 @@ class FeedData:
     def __rtruediv__(self, scalar):
         if isinstance(scalar, (int, float)):
             return FeedData(
-                self.datetime,
+                self.epoch_ns,
                 scalar / self.open,
                 scalar / self.high,
                 scalar / self.low,
                 scalar / self.close,
                 scalar / self.volume,
                 self.symbol,
+                self.tick_epoch_ns,
             )
         return NotImplemented
 
     def __abs__(self):
         return FeedData(
-            self.datetime,
+            self.epoch_ns,
             abs(self.open),
             abs(self.high),
             abs(self.low),
             abs(self.close),
             abs(self.volume),
             self.symbol,
+            self.tick_epoch_ns,
         )
 
     # Comparison operators (by close price)
     def _as_tuple(self):
         # You can choose which fields to include in the comparison
         return (
-            self.datetime,
+            self.epoch_ns,
             self.open,
             self.high,
             self.low,
@@ -153,7 +266,119 @@ class FeedData:
 
     def __repr__(self):
         return (
-            f"FeedData(datetime={self.datetime!r}, open={self.open}, "
+            f"FeedData(epoch_ns={self.epoch_ns!r}, open={self.open}, "
             f"high={self.high}, low={self.low}, close={self.close}, "
             f"volume={self.volume}, symbol={self.symbol!r})"
         )
+
+
+class FeedBatch:
+    """A run of ticks or bars of one symbol as numpy columns.
+
+    epoch_ns is int64, the price and volume columns are float64, all of the
+    same length. Columns may be views into a source's buffers, treat them as
+    read-only. tick_epoch_ns is the FeedData field of the same name and
+    defaults to the epoch_ns column.
+    """
+
+    __slots__ = (
+        "epoch_ns",
+        "open",
+        "high",
+        "low",
+        "close",
+        "volume",
+        "symbol",
+        "tick_epoch_ns",
+    )
+
+    def __init__(
+        self, epoch_ns, open, high, low, close, volume, symbol: str, tick_epoch_ns=None
+    ):
+        self.epoch_ns = epoch_ns
+        self.open = open
+        self.high = high
+        self.low = low
+        self.close = close
+        self.volume = volume
+        self.symbol = symbol
+        self.tick_epoch_ns = epoch_ns if tick_epoch_ns is None else tick_epoch_ns
+
+    @classmethod
+    def from_ticks(cls, epoch_ns, ltp, volume, symbol):
+        """Ticks as single price bars, the price columns share the ltp array"""
+        return cls(epoch_ns, ltp, ltp, ltp, ltp, volume, symbol)
+
+    @classmethod
+    def from_feed_datas(cls, feed_datas, symbol=None):
+        count = len(feed_datas)
+        return cls(
+            np.fromiter((data.epoch_ns for data in feed_datas), np.int64, count),
+            np.fromiter((data.open for data in feed_datas), np.float64, count),
+            np.fromiter((data.high for data in feed_datas), np.float64, count),
+            np.fromiter((data.low for data in feed_datas), np.float64, count),
+            np.fromiter((data.close for data in feed_datas), np.float64, count),
+            np.fromiter((data.volume for data in feed_datas), np.float64, count),
+            symbol if symbol is not None else feed_datas[0].symbol,
+            np.fromiter((data.tick_epoch_ns for data in feed_datas), np.int64, count),
+        )
+
+    @classmethod
+    def concatenate(cls, batches):
+        """Rows of batches one after the other, batches of one symbol"""
+        if len(batches) == 1:
+            return batches[0]
+        return cls(
+            *(
+                np.concatenate([getattr(batch, field) for batch in batches])
+                for field in ("epoch_ns", "open", "high", "low", "close", "volume")
+            ),
+            batches[0].symbol,
+            np.concatenate([batch.tick_epoch_ns for batch in batches]),
+        )
+
+    def __len__(self):
+        return len(self.epoch_ns)
+
+    def __getitem__(self, index: slice):
+        """Rows index as a batch, the columns are views"""
+        return FeedBatch(
+            self.epoch_ns[index],
+            self.open[index],
+            self.high[index],
+            self.low[index],
+            self.close[index],
+            self.volume[index],
+            self.symbol,
+            self.tick_epoch_ns[index],
+        )
+
+    def row(self, index) -> FeedData:
+        return FeedData(
+            int(self.epoch_ns[index]),
+            float(self.open[index]),
+            float(self.high[index]),
+            float(self.low[index]),
+            float(self.close[index]),
+            float(self.volume[index]),
+            self.symbol,
+            int(self.tick_epoch_ns[index]),
+        )
+
+    def to_feed_datas(self):
+        symbol = self.symbol
+        return [
+            FeedData(epoch_ns, open, high, low, close, volume, symbol, tick_epoch_ns)
+            for epoch_ns, open, high, low, close, volume, tick_epoch_ns in zip(
+                self.epoch_ns.tolist(),
+                self.open.tolist(),
+                self.high.tolist(),
+                self.low.tolist(),
+                self.close.tolist(),
+                self.volume.tolist(),
+                self.tick_epoch_ns.tolist(),
+            )
+        ]
+
+    def __repr__(self):
+        return f"FeedBatch(symbol={self.symbol!r}, rows={len(self)})"
@@ -0,0 +1,235 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from feeds import BaseFeed, EndOfSession, FeedData
+from feeds.aggregator_feed import AggregatorFeed
+
+FIELDS = ("epoch_ns", "open", "high", "low", "close", "volume", "tick_epoch_ns")
+
+
+def leg_arrays(step, count, seed):
+    prices = (100 + np.random.default_rng(seed).normal(size=count).cumsum()).round(2)
+    return {"epoch": 1_745_200_000 + np.arange(count) * step, "ltp": prices}
+
+
+def make_aggregator(legs, formula="A - 2*B", batch_rows=50, **configs):
+    return AggregatorFeed(
+        feed_name="SPREAD",
+        formula=formula,
+        sub_feed_configs=[
+            {
+                "feed_name": name,
+                "feed_type": "ARRAY_REPLAY_FEED",
+                "batch_rows": batch_rows,
+                "data": data,
+            }
+            for name, data in legs.items()
+        ],
+        **configs,
+    )
+
+
+def per_tick_rows(aggregator, legs):
+    """Rows of the per-tick path, with the leg ticks arriving in epoch order"""
+    ticks = {}
+    for name, data in legs.items():
+        for epoch, ltp in zip(data["epoch"], data["ltp"]):
+            epoch_ns = int(epoch * 1e9)
+            ticks.setdefault(epoch_ns, {})[name] = FeedData(
+                epoch_ns, ltp, ltp, ltp, ltp, 0, name
+            )
+    rows = []
+    for epoch_ns in sorted(ticks):
+        # Legs without a tick at this epoch give None, like an empty queue
+        data = aggregator._combine(
+            [ticks[epoch_ns].get(feed.name) for feed in aggregator.feeds]
+        )
+        if data is not None:
+            rows.append([getattr(data, field) for field in FIELDS])
+    return np.array(rows)
+
+
+def drain(aggregator):
+    batches = []
+    try:
+        while True:
+            batch = aggregator.next_batch(None)
+            if batch is not None:
+                batches.append(batch)
+    except EndOfSession:
+        pass
+    return batches
+
+
+@pytest.mark.parametrize(
+    "formula, configs",
+    [
+        ("A - 2*B", {}),
+        ("A - 2*B", {"as_of_tolerance_seconds": 2}),
+        ("abs(A / B - 1)", {}),
+    ],
+)
+def test_next_batch_with_legs_of_different_density_matches_per_tick_path(
+    formula, configs
+):
+    legs = {"A": leg_arrays(1.0, 400, seed=1), "B": leg_arrays(4.0, 100, seed=2)}
+
+    batches = drain(make_aggregator(legs, formula, **configs))
+
+    epochs = np.concatenate([batch.epoch_ns for batch in batches])
+    assert (np.diff(epochs) > 0).all()
+    rows = np.array(
+        [
+            np.concatenate([getattr(batch, field) for batch in batches])
+            for field in FIELDS
+        ]
+    ).T
+    expected = per_tick_rows(make_aggregator(legs, formula, **configs), legs)
+    np.testing.assert_array_equal(rows[:, 0], expected[:, 0])
+    np.testing.assert_allclose(rows[:, 1:6], expected[:, 1:6])
+    np.testing.assert_array_equal(rows[:, 6], expected[:, 6])
+
+
+def tick(name, epoch, ltp, volume=0):
+    return FeedData(int(epoch * 1e9), ltp, ltp, ltp, ltp, volume, name)
+
+
+def test_running_aggregate_matches_full_recompute():
+    legs = {
+        "A": leg_arrays(1.0, 300, seed=3),
+        "B": leg_arrays(3.0, 100, seed=4),
+        "C": leg_arrays(7.0, 43, seed=5),
+    }
+    aggregator = make_aggregator(legs, "3 + 2*A - 1.5*B + C/4")
+    ticks = {}
+    for name, data in legs.items():
+        for epoch, ltp in zip(data["epoch"], data["ltp"]):
+            ticks.setdefault(epoch, {})[name] = tick(name, epoch, ltp, volume=epoch % 5)
+
+    outputs = 0
+    for epoch in sorted(ticks):
+        data = aggregator._combine(
+            [ticks[epoch].get(feed.name) for feed in aggregator.feeds]
+        )
+        if data is None:
+            continue
+        outputs += 1
+        # Only the updated legs' deltas went into the running aggregate
+        expected = aggregator.evaluate_data(aggregator.prev_feed_data)
+        assert data.epoch_ns == expected.epoch_ns
+        np.testing.assert_allclose(
+            [data.open, data.high, data.low, data.close, data.volume],
+            [
+                expected.open,
+                expected.high,
+                expected.low,
+                expected.close,
+                expected.volume,
+            ],
+        )
+    assert outputs == len(ticks)
+
+
+def test_running_aggregate_is_rebuilt_every_full_recompute_every_updates():
+    aggregator = make_aggregator(
+        {"A": leg_arrays(1.0, 1, seed=6), "B": leg_arrays(1.0, 1, seed=7)},
+        full_recompute_every=5,
+    )
+    recomputes = []
+    recompute = aggregator._recompute
+    aggregator._recompute = lambda: recomputes.append(1) or recompute()
+
+    for epoch in range(20):
+        aggregator._combine([tick("A", epoch, 100.0 + epoch), tick("B", epoch, 50.0)])
+
+    # Once when both legs have data, then on every third call here, two leg
+    # updates per call reach five on the third
+    assert len(recomputes) == 7
+    assert aggregator.updates < 5
+
+
+def test_output_is_held_back_while_legs_are_further_apart_than_the_tolerance():
+    aggregator = make_aggregator(
+        {"A": leg_arrays(1.0, 1, seed=8), "B": leg_arrays(1.0, 1, seed=9)},
+        as_of_tolerance_seconds=2,
+    )
+
+    assert aggregator._combine([tick("A", 10, 101.0), tick("B", 10, 50.0)]) is not None
+    assert aggregator._combine([tick("A", 12, 102.0), None]) is not None
+    # B is still at 10
+    assert aggregator._combine([tick("A", 13, 103.0), None]) is None
+    data = aggregator._combine([None, tick("B", 13, 51.0)])
+    assert data.close == pytest.approx(103.0 - 2 * 51.0)
+
+
+def test_output_is_held_back_while_a_leg_is_stale(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("feeds.aggregator_feed.time.monotonic", lambda: clock[0])
+    aggregator = AggregatorFeed(
+        feed_name="SPREAD",
+        formula="A - 2*B",
+        sub_feed_configs=[
+            {
+                "feed_name": "A",
+                "feed_type": "ARRAY_REPLAY_FEED",
+                "data": leg_arrays(1.0, 1, seed=10),
+            },
+            {
+                "feed_name": "B",
+                "feed_type": "ARRAY_REPLAY_FEED",
+                "data": leg_arrays(1.0, 1, seed=11),
+                "max_staleness_seconds": 5,
+            },
+        ],
+    )
+
+    assert aggregator._combine([tick("A", 1, 101.0), tick("B", 1, 50.0)]) is not None
+    clock[0] = 4.0
+    assert aggregator._combine([tick("A", 2, 102.0), None]) is not None
+    clock[0] = 6.0
+    # B delivered nothing for more than its 5 seconds, A has no limit
+    assert aggregator._combine([tick("A", 3, 103.0), None]) is None
+    assert aggregator._combine([None, tick("B", 3, 51.0)]) is not None
+
+
+class QueueLeg(BaseFeed):
+    """Source leg whose next_async waits on an asyncio queue like a BRPOP"""
+
+    def __init__(self, name, block_timeout):
+        super().__init__(feed_name=name)
+        self.queue = asyncio.Queue()
+        self.block_timeout = block_timeout
+
+    async def next_async(self, data):
+        try:
+            return await asyncio.wait_for(self.queue.get(), self.block_timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+def test_next_async_does_not_wait_for_quiet_legs():
+    async def scenario():
+        aggregator = make_aggregator(
+            {"A": leg_arrays(1.0, 1, seed=12), "B": leg_arrays(1.0, 1, seed=13)}
+        )
+        legs = [QueueLeg("A", block_timeout=0.1), QueueLeg("B", block_timeout=30)]
+        aggregator.feeds = legs
+        legs[0].queue.put_nowait(tick("A", 1, 101.0))
+        legs[1].queue.put_nowait(tick("B", 1, 50.0))
+        while await aggregator.next_async(None) is None:
+            pass
+
+        legs[0].queue.put_nowait(tick("A", 2, 103.0))
+        # B stays empty, its 30 second wait must not hold back A's tick
+        data = await asyncio.wait_for(aggregator.next_async(None), 5)
+        assert data.close == pytest.approx(103.0 - 2 * 50.0)
+        assert data.epoch_ns == 2 * 10**9
+
+        # The pending wait on B is reused and still picks up its tick
+        legs[1].queue.put_nowait(tick("B", 3, 51.0))
+        data = await asyncio.wait_for(aggregator.next_async(None), 5)
+        assert data.close == pytest.approx(103.0 - 2 * 51.0)
+
+    asyncio.run(scenario())
@@ -0,0 +1,69 @@
+from datetime import datetime
+
+import backtrader as bt
+import numpy as np
+
+from feeds.instrument_feed import InstrumentFeed
+from utils.tick_archive import TickArchiveWriter, list_days, load_day
+
+
+def test_record_feed_flushes_partial_chunk_on_end_of_session(tmp_path):
+    start = datetime(2025, 4, 21, 9, 15).timestamp()
+    epochs = start + np.arange(250, dtype=float)
+    ltps = 100 + np.arange(250, dtype=float) / 100
+
+    feed = InstrumentFeed(
+        name="TEST",
+        session_time={"start_time": "2025-04-21 09:00"},
+        idle_policy={"idle_timeout": 1},
+        feed_type="PIPELINE_FEED",
+        pipeline_feed_config={
+            "feed_name": "record",
+            "sub_feed_configs": [
+                {
+                    "feed_name": "TEST",
+                    "feed_type": "ARRAY_REPLAY_FEED",
+                    "data": {"epoch": epochs, "ltp": ltps},
+                },
+                {
+                    "feed_name": "TEST",
+                    "feed_type": "RECORD_FEED",
+                    "archive_root": str(tmp_path),
+                    "flush_every": 1000,
+                },
+            ],
+        },
+        timeframe=bt.TimeFrame.Seconds,
+        compression=1,
+    )
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(bt.Strategy)
+    cerebro.run(preload=False)
+
+    days = list_days(str(tmp_path), "TEST")
+    assert len(days) == 1
+    recorded_epochs, recorded_ltps, _ = load_day(str(tmp_path), "TEST", days[0])
+    np.testing.assert_array_equal(recorded_epochs, epochs)
+    np.testing.assert_array_equal(recorded_ltps, ltps)
+
+
+def test_writer_realigns_columns_left_uneven_by_a_crashed_flush(tmp_path):
+    start = datetime(2025, 4, 21, 9, 15).timestamp()
+    writer = TickArchiveWriter(str(tmp_path), "TEST")
+    for i in range(3):
+        writer.append(start + i, 100.0 + i)
+    writer.flush()
+    # A crash after the epoch column of the next flush was appended
+    day_dir = tmp_path / "TEST" / str(list_days(str(tmp_path), "TEST")[0])
+    with open(day_dir / "epoch.f8", "ab") as f:
+        np.array([start + 3, start + 4], dtype="<f8").tofile(f)
+
+    writer = TickArchiveWriter(str(tmp_path), "TEST")
+    writer.append(start + 5, 105.0)
+    writer.close()
+
+    day = list_days(str(tmp_path), "TEST")[0]
+    epochs, ltps, _ = load_day(str(tmp_path), "TEST", day)
+    np.testing.assert_array_equal(epochs, start + np.array([0, 1, 2, 5]))
+    np.testing.assert_array_equal(ltps, [100.0, 101.0, 102.0, 105.0])
@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+from feeds import BaseFeed
+from feeds.async_runtime import AsyncFeedRuntime
+
+
+class WaitingFeed(BaseFeed):
+    """Source feed whose next_async never gets a tick"""
+
+    def __init__(self):
+        super().__init__(feed_name="WAIT")
+        self.waiting = None
+        self.closed_async = False
+
+    async def next_async(self, data):
+        self.waiting = asyncio.get_running_loop().create_future()
+        return await self.waiting
+
+    async def close_async(self):
+        self.closed_async = True
+
+    def source_feeds(self):
+        return [self]
+
+
+class Helper:
+    def __init__(self, feed):
+        self.feed = feed
+
+    async def next_async(self):
+        return await self.feed.next_async(None)
+
+    def source_feeds(self):
+        return self.feed.source_feeds()
+
+
+def test_stop_cancels_pending_tasks_and_closes_async_clients():
+    runtime = AsyncFeedRuntime()
+    feeds = [WaitingFeed() for _ in range(3)]
+    for feed in feeds:
+        runtime.register(Helper(feed))
+    while any(feed.waiting is None for feed in feeds):
+        time.sleep(0.001)
+
+    runtime.stop()
+
+    assert runtime.loop.is_closed()
+    assert all(feed.waiting.cancelled() for feed in feeds)
+    assert all(feed.closed_async for feed in feeds)
+
+
+def test_runtime_can_be_started_again_after_stop():
+    runtime = AsyncFeedRuntime()
+    runtime.register(Helper(WaitingFeed()))
+    runtime.stop()
+
+    feed = WaitingFeed()
+    runtime.register(Helper(feed))
+    while feed.waiting is None:
+        time.sleep(0.001)
+    runtime.stop()
+
+    assert runtime.loop.is_closed()
+    assert feed.waiting.cancelled()
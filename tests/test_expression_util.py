@@ -0,0 +1,64 @@
+import math
+
+import numpy as np
+import pytest
+
+from utils.expression_util import Expression
+
+
+@pytest.mark.parametrize(
+    "formula, constant, weights",
+    [
+        ("2*A - 1.5*B", 0.0, [2.0, -1.5]),
+        ("A - (B - 3) * 4", 12.0, [1.0, -4.0]),
+        ("-(A + B) / 2 + A", 0.0, [0.5, -0.5]),
+        ("+A * 2 * 3 - B", 0.0, [6.0, -1.0]),
+    ],
+)
+def test_linear_formulas_get_a_constant_and_leg_weights(formula, constant, weights):
+    expression = Expression(formula)
+
+    assert expression.names == ("A", "B")
+    assert expression.is_linear
+    assert not expression.outer_abs
+    assert expression.constant == pytest.approx(constant)
+    np.testing.assert_allclose(expression.weights, weights)
+    values = [3.0, 7.0]
+    assert expression.evaluate(values) == pytest.approx(
+        constant + np.dot(weights, values)
+    )
+
+
+def test_one_outer_abs_keeps_a_formula_linear():
+    expression = Expression("abs(A - 2*B)")
+
+    assert expression.is_linear
+    assert expression.outer_abs
+    np.testing.assert_allclose(expression.weights, [1.0, -2.0])
+    assert expression.evaluate([1.0, 3.0]) == 5.0
+
+
+@pytest.mark.parametrize("formula", ["A * B", "A / B", "abs(A) - B", "A / 0"])
+def test_non_linear_formulas_have_no_weights(formula):
+    expression = Expression(formula)
+
+    assert not expression.is_linear
+    assert not expression.outer_abs
+    assert expression.weights is None
+
+
+def test_division_by_zero_is_nan():
+    assert math.isnan(Expression("A / B").evaluate([1.0, 0.0]))
+    assert math.isnan(Expression("A / 0").evaluate([1.0]))
+
+    with np.errstate(all="raise"):
+        ratios = Expression("A / B").evaluate_columns(
+            [np.array([1.0, 0.0, 4.0]), np.array([0.0, 0.0, 2.0])]
+        )
+    np.testing.assert_array_equal(ratios, [np.inf, np.nan, 2.0])
+
+
+@pytest.mark.parametrize("formula", ["A ** 2", "max(A, B)", "A +", "'A'"])
+def test_unsupported_formulas_raise(formula):
+    with pytest.raises(Exception, match="Invalid formula"):
+        Expression(formula)
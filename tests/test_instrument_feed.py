@@ -0,0 +1,197 @@
+from datetime import datetime
+
+import backtrader as bt
+import fakeredis
+import pandas as pd
+
+from feeds.instrument_feed import InstrumentFeed
+from utils.redis_queue import RedisQueue
+from utils.tick_codec import END_OF_SESSION, HEARTBEAT
+
+SESSION_START = datetime(2025, 4, 21, 9, 15).timestamp()
+
+
+def make_feed(ticks, stages, **configs):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    queue = RedisQueue("test:instrument", client=client)
+    queue.push_many(ticks + [END_OF_SESSION])
+    configs.setdefault("session_time", {"start_time": "2025-04-21 09:00"})
+    return InstrumentFeed(
+        name="TEST",
+        feed_type="PIPELINE_FEED",
+        pipeline_feed_config={
+            "feed_name": "pipeline",
+            "sub_feed_configs": [
+                {
+                    "feed_name": "TEST",
+                    "feed_type": "OHLC_QUEUE_FEED",
+                    "redis_feed_key": "test:instrument",
+                    "redis_pool_config": {"client": client},
+                },
+                *stages,
+            ],
+        },
+        timeframe=bt.TimeFrame.Seconds,
+        compression=1,
+        **configs,
+    )
+
+
+def run(feed):
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(bt.Strategy)
+    cerebro.run(preload=False)
+    return feed
+
+
+def test_backoff_does_not_sleep_while_source_has_ticks(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr("feeds.instrument_feed.time.sleep", sleeps.append)
+    ticks = [{"epoch": SESSION_START + i, "ltp": 100 + i % 7} for i in range(60)]
+    feed = make_feed(
+        ticks,
+        [
+            {
+                "feed_name": "TEST",
+                "feed_type": "RESAMPLE_FEED",
+                "time_frame_in_seconds": 5,
+            }
+        ],
+        idle_policy={"mode": "BACKOFF", "idle_timeout": 1},
+    )
+
+    run(feed)
+
+    # Most ticks do not complete a bar, none of them is idleness
+    assert len(feed) == 11
+    assert sleeps == []
+
+
+class Recorder:
+    def __init__(self):
+        self.values = []
+
+    def observe(self, value_ns):
+        self.values.append(value_ns)
+
+
+def test_tick_to_bar_latency_is_measured_from_the_completing_tick(monkeypatch):
+    start = int(SESSION_START)
+    now_ns = (start + 120) * 1_000_000_000
+    monkeypatch.setattr("feeds.instrument_feed.time.time_ns", lambda: now_ns)
+    ticks = [{"epoch": start + i, "ltp": 100 + i % 7} for i in range(60)]
+    feed = make_feed(
+        ticks,
+        [
+            {
+                "feed_name": "TEST",
+                "feed_type": "RESAMPLE_FEED",
+                "time_frame_in_seconds": 5,
+            }
+        ],
+        metrics_enabled=True,
+    )
+    feed.tick_to_bar_latency = Recorder()
+
+    run(feed)
+
+    # Bar k starts at start + 5k and goes out with the tick at start + 5(k + 1)
+    assert feed.tick_to_bar_latency.values == [
+        now_ns - (start + 5 * (bar + 1)) * 1_000_000_000 for bar in range(len(feed))
+    ]
+
+
+class StatusRecorder(bt.Strategy):
+    def __init__(self):
+        self.statuses = []
+        self.bars = []
+
+    def notify_data(self, data, status, *args, **kwargs):
+        self.statuses.append(data._getstatusname(status))
+
+    def next(self):
+        self.bars.append((self.statuses[-1], self.data.datetime.datetime(0)))
+
+
+def test_warmup_bars_are_delayed_until_the_live_handoff():
+    warmup_start = SESSION_START - 86400
+    warmup = pd.DataFrame(
+        {"epoch": [warmup_start + i for i in range(20)], "ltp": [100.0] * 20}
+    )
+    ticks = [{"epoch": SESSION_START + i, "ltp": 101.0} for i in range(20)]
+    feed = make_feed(
+        ticks,
+        [
+            {
+                "feed_name": "TEST",
+                "feed_type": "RESAMPLE_FEED",
+                "time_frame_in_seconds": 5,
+            }
+        ],
+        warmup={"source": warmup},
+    )
+    cerebro = bt.Cerebro(stdstats=False)
+    cerebro.adddata(feed)
+    cerebro.addstrategy(StatusRecorder)
+    strategy = cerebro.run(preload=False)[0]
+
+    assert strategy.statuses == ["DELAYED", "LIVE"]
+    delayed = [dt for status, dt in strategy.bars if status == "DELAYED"]
+    live = [dt for status, dt in strategy.bars if status == "LIVE"]
+    # The warm-up day is before session_time and still reaches the strategy
+    assert len(delayed) == 3
+    assert all(dt.timestamp() < SESSION_START for dt in delayed)
+    assert all(dt.timestamp() >= SESSION_START for dt in live)
+
+
+def make_queue_feed(**configs):
+    client = fakeredis.FakeRedis(decode_responses=True)
+    queue = RedisQueue("test:instrument", client=client)
+    feed = InstrumentFeed(
+        name="TEST",
+        session_time={"start_time": "2025-04-21 09:00"},
+        feed_type="OHLC_QUEUE_FEED",
+        feed_name="TEST",
+        redis_feed_key="test:instrument",
+        redis_pool_config={"client": client},
+        timeframe=bt.TimeFrame.Seconds,
+        compression=1,
+        **configs,
+    )
+    return feed, queue
+
+
+def fake_clock(monkeypatch):
+    clock = [0.0]
+    monkeypatch.setattr("feeds.instrument_feed.time.monotonic", lambda: clock[0])
+    monkeypatch.setattr("feeds.ohlc_feed.time.monotonic", lambda: clock[0])
+    return clock
+
+
+def test_producer_heartbeats_keep_an_idle_feed_alive(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    monkeypatch.setattr("feeds.instrument_feed.time.sleep", lambda seconds: None)
+    feed, queue = make_queue_feed(idle_policy={"idle_timeout": 1})
+
+    assert feed._load() is None
+    for now in (0.8, 1.6, 2.4):
+        clock[0] = now
+        queue.push(HEARTBEAT)
+        assert feed._load() is None
+    clock[0] = 3.5
+    # Quiet for longer than idle_timeout without a heartbeat, producer gone
+    assert feed._load() is False
+
+
+def test_default_idle_policy_has_no_wall_clock_timeout(monkeypatch):
+    clock = fake_clock(monkeypatch)
+    sleeps = []
+    monkeypatch.setattr("feeds.instrument_feed.time.sleep", sleeps.append)
+    feed, _ = make_queue_feed()
+
+    assert feed._load() is None
+    clock[0] = 3600.0
+    assert feed._load() is None
+    # BACKOFF by default, idle polls sleep
+    assert len(sleeps) == 2
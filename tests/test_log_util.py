@@ -0,0 +1,25 @@
+import json
+import logging
+
+from utils.log_util import FieldsFormatter
+
+
+def _record(fields=None):
+    record = logging.LogRecord(
+        "algovert.broker", logging.INFO, __file__, 1, "Order rejected", None, None
+    )
+    if fields is not None:
+        record.fields = fields
+    return record
+
+
+def test_fields_formatter_appends_key_values_or_json():
+    fields = {"ref": 7, "symbol": "NSE:NIFTY", "reason": "margin"}
+
+    line = FieldsFormatter().format(_record(fields))
+    assert line.endswith("Order rejected ref=7 symbol=NSE:NIFTY reason=margin")
+
+    line = FieldsFormatter("json").format(_record(fields))
+    assert json.loads(line[line.index("{") :]) == fields
+
+    assert FieldsFormatter().format(_record()).endswith("Order rejected")
@@ -0,0 +1,40 @@
+import pytest
+
+import manager.parameter_sweep as parameter_sweep
+from manager.parameter_sweep import ParameterSweep, set_path
+
+DEFINITION = {
+    "strategy": "SMA_CROSS",
+    "feed_details": [{"feed_type": "OHLC_QUEUE_FEED", "resample_seconds": 60}],
+}
+
+
+def test_set_path_creates_strategy_params_only():
+    definition = {"feed_details": [{"resample_seconds": 60}]}
+
+    set_path(definition, "strategy_params.multiplier", 2)
+    set_path(definition, "feed_details.0.resample_seconds", 300)
+
+    assert definition["strategy_params"] == {"multiplier": 2}
+    assert definition["feed_details"][0]["resample_seconds"] == 300
+    for path in (
+        "feed_detail.0.resample_seconds",
+        "feed_details.1.resample_seconds",
+        "feed_details.0.resample_second",
+        "strategy_params.sma.period",
+    ):
+        with pytest.raises(KeyError):
+            set_path(definition, path, 1)
+    assert "feed_detail" not in definition
+
+
+def test_sweep_rejects_unknown_paths_before_starting_the_pool(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("the pool must not start")
+
+    monkeypatch.setattr(parameter_sweep, "ProcessPoolExecutor", fail)
+    grid = {"strategy_params.fast": [5, 10], "feed_details.0.resample_secs": [60]}
+
+    with ParameterSweep(DEFINITION, grid, workers=1) as sweep:
+        with pytest.raises(KeyError, match="resample_secs"):
+            sweep.run()
@@ -0,0 +1,22 @@
+import fakeredis
+import pytest
+
+from utils.redis_queue import QueueFull, RedisQueue
+
+
+def test_rejected_push_many_reports_how_many_items_were_queued():
+    client = fakeredis.FakeRedis(decode_responses=True)
+    queue = RedisQueue(
+        "test:bounded", client=client, maxlen=10, overflow_policy="REJECT"
+    )
+    queue.push_many([{"epoch": i, "ltp": 1} for i in range(3)])
+    items = [{"epoch": i, "ltp": 2} for i in range(3, 20)]
+
+    with pytest.raises(QueueFull) as raised:
+        queue.push_many(items, batch_size=4)
+
+    # One batch of four fits on top of the three queued before
+    assert raised.value.pushed == 4
+    assert queue.size() == 7
+    assert queue.rejected == len(items) - raised.value.pushed
+    assert [tick["epoch"] for tick in queue.pop_many(10)] == list(range(7))
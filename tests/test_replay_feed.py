@@ -0,0 +1,17 @@
+import numpy as np
+
+from feeds.replay_feed import ArrayReplayFeed
+
+
+def _feed():
+    data = {"epoch": np.arange(4, dtype=float), "ltp": [100.123, 100.456, 1.005, 2.0]}
+    return ArrayReplayFeed(feed_name="TEST", data=data, batch_rows=2)
+
+
+def test_ltp_is_rounded_on_the_row_and_batch_paths():
+    rows = _feed()
+    assert [rows.next(None).close for _ in range(4)] == [100.12, 100.46, 1.0, 2.0]
+
+    batches = _feed()
+    closes = np.concatenate([batches.next_batch(None).close for _ in range(2)])
+    assert closes.tolist() == [100.12, 100.46, 1.0, 2.0]
@@ -0,0 +1,34 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from models import FeedData
+from utils.resampler_util import DataResampler
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+def _epoch_ns(hour, minute):
+    return int(datetime(2025, 4, 21, hour, minute, tzinfo=IST).timestamp() * 1e9)
+
+
+def test_hourly_bars_start_on_the_local_hour_in_ist():
+    epochs = np.array([_epoch_ns(9, 15), _epoch_ns(9, 59), _epoch_ns(10, 5)])
+    prices = np.array([100.0, 101.0, 102.0])
+
+    sampler = DataResampler(timeframe_seconds=3600, utc_offset_seconds=19800)
+    for epoch_ns, price in zip(epochs.tolist(), prices.tolist()):
+        sampler.update(FeedData(epoch_ns, price, price, price, price, 0, "NIFTY"))
+    assert sampler.get_prev_bar().timestamp == _epoch_ns(9, 0)
+    assert sampler.get_current_bar().timestamp == _epoch_ns(10, 0)
+
+    batch_sampler = DataResampler(timeframe_seconds=3600, utc_offset_seconds=19800)
+    starts = batch_sampler.update_batch(epochs, prices)[0]
+    assert starts.tolist() == [_epoch_ns(9, 0)]
+    assert batch_sampler.get_current_bar().timestamp == _epoch_ns(10, 0)
+
+
+def test_history_size_below_one_is_rejected():
+    with pytest.raises(ValueError):
+        DataResampler(history_size=0)
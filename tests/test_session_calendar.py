@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from utils.session_calendar import SessionCalendar
+
+
+def epoch(text):
+    return datetime.fromisoformat(text).timestamp()
+
+
+def test_weekdays_apply_without_daily_sessions():
+    calendar = SessionCalendar(
+        start_time="2025-04-18 09:00",
+        end_time="2025-04-22 16:00",
+        weekdays=(0, 1, 2, 3, 4),
+    )
+
+    assert calendar.is_in_session(epoch("2025-04-18 10:00"))  # Friday
+    assert not calendar.is_in_session(epoch("2025-04-19 10:00"))  # Saturday
+    assert not calendar.is_in_session(epoch("2025-04-20 10:00"))  # Sunday
+    assert calendar.is_in_session(epoch("2025-04-21 10:00"))  # Monday
+
+
+def test_absolute_window_covers_weekends_by_default():
+    calendar = SessionCalendar(
+        start_time="2025-04-18 09:00", end_time="2025-04-22 16:00"
+    )
+
+    assert calendar.is_in_session(epoch("2025-04-19 10:00"))  # Saturday
+
+
+def test_daily_sessions_default_to_monday_to_friday():
+    calendar = SessionCalendar(sessions=[["09:15", "15:30"]])
+
+    assert calendar.is_in_session(epoch("2025-04-18 10:00"))  # Friday
+    assert not calendar.is_in_session(epoch("2025-04-19 10:00"))  # Saturday
+
+
+def test_every_weekday_allows_weekends():
+    calendar = SessionCalendar(weekdays=range(7))
+
+    assert calendar.is_in_session(epoch("2025-04-19 10:00"))
+
+
+def test_empty_config_has_no_calendar():
+    assert SessionCalendar.from_config({}) is None
+    assert SessionCalendar.from_config(None) is None
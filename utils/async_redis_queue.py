@@ -0,0 +1,58 @@
+from utils.redis_pool import get_async_redis, get_dedicated_async_redis
+from utils.tick_codec import get_codec
+
+
+class AsyncRedisQueue:
+    """asyncio flavour of the consumer side of RedisQueue"""
+
+    def __init__(self, name, namespace="queue", codec="JSON", **pool_configs):
+        self.key = f"{namespace}:{name}"
+        self.codec = get_codec(codec)
+        self.pool_configs = pool_configs
+        self.redis = get_async_redis(
+            decode_responses=self.codec.decode_responses, **pool_configs
+        )
+        # Opened on the first blocking_pop, kept out of the shared pool
+        self.blocking_redis = None
+
+    async def push(self, item):
+        """Push item to the left side of the queue"""
+        await self.redis.lpush(self.key, self.codec.encode(item))
+
+    async def pop(self):
+        """Pop item from the right side (FIFO)"""
+        return self.codec.decode(await self.redis.rpop(self.key))
+
+    async def pop_many(self, count):
+        """Pop up to count items from the right side (FIFO) in one round trip"""
+        items = await self.redis.rpop(self.key, count)
+        if not items:
+            return []
+        decode = self.codec.decode
+        return [decode(item) for item in items]
+
+    async def blocking_pop(self, timeout=1):
+        """Wait up to timeout seconds for an item on the right side (FIFO)"""
+        if self.blocking_redis is None:
+            self.blocking_redis = get_dedicated_async_redis(
+                decode_responses=self.codec.decode_responses, **self.pool_configs
+            )
+        item = await self.blocking_redis.brpop(self.key, timeout=timeout)
+        if item is None:
+            return None
+        return self.codec.decode(item[1])
+
+    async def is_empty(self):
+        """Check if the queue is empty"""
+        return await self.redis.llen(self.key) == 0
+
+    async def size(self):
+        """Get current queue size"""
+        return await self.redis.llen(self.key)
+
+    async def close(self):
+        """Close the blocking connection, the shared pool stays open"""
+        await self.redis.aclose()
+        if self.blocking_redis is not None:
+            await self.blocking_redis.aclose()
+            self.blocking_redis = None
@@ -0,0 +1,161 @@
+import ast
+
+import numpy as np
+
+# Plan opcodes
+LOAD, CONST, ADD, SUB, MUL, DIV, NEG, ABS = range(8)
+
+BINARY_OPS = {ast.Add: ADD, ast.Sub: SUB, ast.Mult: MUL, ast.Div: DIV}
+
+
+def _divide(left, right):
+    try:
+        return left / right
+    except ZeroDivisionError:
+        return float("nan")
+
+
+class Expression:
+    """Spread or basket formula over leg names, e.g. "2*A - 1.5*B" or "A/B".
+
+    Formulas may use + - * /, unary minus, numbers, leg names and abs().
+    They are parsed once into a flat postfix plan which evaluates the same
+    on floats, for one tick, and on numpy arrays, for a whole batch. Linear
+    formulas, optionally wrapped in one outer abs(), also get a weight per
+    leg so callers can skip the plan and do a weighted sum instead.
+    """
+
+    def __init__(self, formula: str):
+        self.formula = formula
+        try:
+            tree = ast.parse(formula, mode="eval")
+        except SyntaxError as e:
+            raise Exception(f"Invalid formula {formula!r}: {e.msg}")
+
+        self.names = []
+        self.plan = []
+        self._compile(tree.body)
+        self.names = tuple(self.names)
+
+        self.outer_abs = self.plan[-1][0] == ABS
+        linear = self._linear(self.plan[:-1] if self.outer_abs else self.plan)
+        if linear is None:
+            self.outer_abs = False
+            self.constant = None
+            self.weights = None
+        else:
+            self.constant, weights = linear
+            self.weights = np.array(
+                [weights.get(index, 0.0) for index in range(len(self.names))]
+            )
+
+    @property
+    def is_linear(self):
+        return self.weights is not None
+
+    def evaluate(self, values):
+        """Evaluate on leg values given in the order of names"""
+        stack = []
+        for op, arg in self.plan:
+            if op == LOAD:
+                stack.append(values[arg])
+            elif op == CONST:
+                stack.append(arg)
+            elif op == NEG:
+                stack[-1] = -stack[-1]
+            elif op == ABS:
+                stack[-1] = abs(stack[-1])
+            else:
+                right = stack.pop()
+                if op == ADD:
+                    stack[-1] = stack[-1] + right
+                elif op == SUB:
+                    stack[-1] = stack[-1] - right
+                elif op == MUL:
+                    stack[-1] = stack[-1] * right
+                else:
+                    stack[-1] = _divide(stack[-1], right)
+        return stack[0]
+
+    def evaluate_columns(self, columns):
+        """Evaluate on leg arrays, division by zero gives inf or nan"""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return self.evaluate(columns)
+
+    def _compile(self, node):
+        if isinstance(node, ast.BinOp) and type(node.op) in BINARY_OPS:
+            self._compile(node.left)
+            self._compile(node.right)
+            self.plan.append((BINARY_OPS[type(node.op)], None))
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.USub):
+            self._compile(node.operand)
+            self.plan.append((NEG, None))
+        elif isinstance(node, ast.UnaryOp) and isinstance(node.op, ast.UAdd):
+            self._compile(node.operand)
+        elif isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            self.plan.append((CONST, float(node.value)))
+        elif isinstance(node, ast.Name):
+            if node.id not in self.names:
+                self.names.append(node.id)
+            self.plan.append((LOAD, self.names.index(node.id)))
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Name)
+            and node.func.id == "abs"
+            and len(node.args) == 1
+            and not node.keywords
+        ):
+            self._compile(node.args[0])
+            self.plan.append((ABS, None))
+        else:
+            raise Exception(
+                f"Invalid formula {self.formula!r}: unsupported {ast.dump(node)}"
+            )
+
+    @staticmethod
+    def _linear(plan):
+        """Constant and leg weights if the plan is linear, else None"""
+        stack = []
+        for op, arg in plan:
+            if op == LOAD:
+                stack.append((0.0, {arg: 1.0}))
+            elif op == CONST:
+                stack.append((arg, {}))
+            elif op == NEG:
+                constant, weights = stack[-1]
+                stack[-1] = (-constant, {k: -w for k, w in weights.items()})
+            elif op == ABS:
+                return None
+            else:
+                right_constant, right_weights = stack.pop()
+                left_constant, left_weights = stack.pop()
+                if op in (ADD, SUB):
+                    sign = 1.0 if op == ADD else -1.0
+                    weights = dict(left_weights)
+                    for index, weight in right_weights.items():
+                        weights[index] = weights.get(index, 0.0) + sign * weight
+                    stack.append((left_constant + sign * right_constant, weights))
+                elif op == MUL and not left_weights:
+                    stack.append(
+                        (
+                            left_constant * right_constant,
+                            {k: left_constant * w for k, w in right_weights.items()},
+                        )
+                    )
+                elif op == MUL and not right_weights:
+                    stack.append(
+                        (
+                            left_constant * right_constant,
+                            {k: w * right_constant for k, w in left_weights.items()},
+                        )
+                    )
+                elif op == DIV and not right_weights and right_constant:
+                    stack.append(
+                        (
+                            left_constant / right_constant,
+                            {k: w / right_constant for k, w in left_weights.items()},
+                        )
+                    )
+                else:
+                    return None
+        return stack[0]
@@ -0,0 +1,136 @@
+import threading
+from collections import deque
+
+from utils.redis_pool import get_redis
+from utils.tick_codec import get_codec
+
+
+class FanInConsumer:
+    """One consumer draining many list queues at once.
+
+    A poll drains every registered key in a single pipelined round trip and
+    sorts the ticks into per-key buffers. When all keys are empty it can
+    block on all of them with one multi-key BRPOP, so a whole watchlist is
+    served by one connection and one wakeup.
+
+    A buffer holds at most max_buffered ticks. Keys with a full buffer are
+    left out of the poll, so a symbol that is read slowly backs up in Redis
+    instead of in memory.
+    """
+
+    def __init__(
+        self,
+        namespace="queue",
+        codec="JSON",
+        batch_size=500,
+        max_buffered=5000,
+        **pool_configs,
+    ):
+        self.namespace = namespace
+        self.codec = get_codec(codec)
+        self.batch_size = batch_size
+        self.max_buffered = max_buffered
+        self.redis = get_redis(
+            decode_responses=self.codec.decode_responses, **pool_configs
+        )
+        self.buffers = {}
+        self.lock = threading.Lock()
+
+    def register(self, name):
+        key = f"{self.namespace}:{name}"
+        with self.lock:
+            if key not in self.buffers:
+                self.buffers[key] = deque()
+        return FanInQueue(self, key)
+
+    def poll(self, timeout=None):
+        """Drain all keys, waiting up to timeout seconds if all are empty"""
+        decode = self.codec.decode
+        with self.lock:
+            rooms = {
+                key: min(self.batch_size, self.max_buffered - len(buffer))
+                for key, buffer in self.buffers.items()
+            }
+            keys = [key for key, room in rooms.items() if room > 0]
+            if not keys:
+                return 0
+
+            pipe = self.redis.pipeline(transaction=False)
+            for key in keys:
+                pipe.rpop(key, rooms[key])
+            received = 0
+            for key, items in zip(keys, pipe.execute()):
+                if items:
+                    self.buffers[key].extend(decode(item) for item in items)
+                    received += len(items)
+        if received or not timeout:
+            return received
+
+        # Blocking without the lock, other consumers keep polling meanwhile
+        item = self.redis.brpop(keys, timeout=timeout)
+        if item is None:
+            return 0
+        key = item[0] if isinstance(item[0], str) else item[0].decode()
+        with self.lock:
+            self.buffers[key].append(decode(item[1]))
+        return 1
+
+
+class FanInQueue:
+    """Per-symbol view of a FanInConsumer with the RedisQueue consumer API"""
+
+    def __init__(self, consumer: FanInConsumer, key):
+        self.consumer = consumer
+        self.key = key
+        self.buffer = consumer.buffers[key]
+
+    def pop(self):
+        if not self.buffer:
+            self.consumer.poll()
+        return self.buffer.popleft()
+
+    def pop_many(self, count):
+        if not self.buffer:
+            self.consumer.poll()
+        items = []
+        while self.buffer and len(items) < count:
+            items.append(self.buffer.popleft())
+        return items
+
+    def blocking_pop(self, timeout=1):
+        if not self.buffer:
+            self.consumer.poll(timeout)
+        if self.buffer:
+            return self.buffer.popleft()
+        return None
+
+    def is_empty(self):
+        if not self.buffer:
+            self.consumer.poll()
+        return not self.buffer
+
+    def size(self):
+        return len(self.buffer) + self.consumer.redis.llen(self.key)
+
+
+_consumers = {}
+_consumer_configs = {}
+_consumers_lock = threading.Lock()
+
+
+def get_fan_in_consumer(group, **configs) -> FanInConsumer:
+    """Process-wide consumer per fan-in group, created on first use.
+
+    Every feed of a group has to pass the same configs, they would silently
+    apply to only some of them otherwise.
+    """
+    with _consumers_lock:
+        if group not in _consumers:
+            _consumers[group] = FanInConsumer(**configs)
+            _consumer_configs[group] = configs
+        elif _consumer_configs[group] != configs:
+            raise Exception(
+                f"Fan-in group {group} already exists with configs "
+                f"{_consumer_configs[group]}, got {configs}"
+            )
+        return _consumers[group]
@@ -0,0 +1,132 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+ROOT_LOGGER = "algovert"
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s %(message)s"
+
+
+class FieldsFormatter(logging.Formatter):
+    """One line per record, the "fields" extra appended as key=value or JSON.
+
+    Runs on the listener thread, callers only pass a dict of plain values:
+        logger.info("Order placed", extra={"fields": {"symbol": s, "qty": 1}})
+    """
+
+    def __init__(self, fields_format="kv"):
+        super().__init__(LOG_FORMAT)
+        self.json_fields = fields_format == "json"
+
+    def format(self, record):
+        line = super().format(record)
+        fields = getattr(record, "fields", None)
+        if not fields:
+            return line
+        if self.json_fields:
+            return f"{line} {json.dumps(fields, default=str)}"
+        return line + " " + " ".join(f"{key}={value}" for key, value in fields.items())
+
+
+class _RecordQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records unformatted, the stock prepare formats on the caller"""
+
+    def prepare(self, record):
+        return record
+
+
+def _parse_levels(levels):
+    """Accepts {"feeds": "DEBUG"} or "feeds=DEBUG,broker=WARNING" """
+    if isinstance(levels, str):
+        levels = dict(item.split("=", 1) for item in levels.split(",") if "=" in item)
+    return {
+        component.strip(): level.strip().upper()
+        for component, level in levels.items()
+    }
+
+
+def setup_logging(levels=None, default_level=None, stream=None, fields_format=None):
+    """Route every component logger through a background writer thread.
+
+    Callers only pay for the level check and a non-blocking enqueue, the
+    formatting and the stream write happen on the listener thread. Message
+    arguments are therefore only turned into strings later, do not log
+    objects that are changed in place after the call. Levels per component
+    come from levels or the LOG_LEVELS environment variable, e.g.
+    LOG_LEVELS="feeds=WARNING,broker=INFO". The fields extra of a record is
+    written as key=value, or as JSON with fields_format="json" or
+    LOG_FIELDS_FORMAT=json.
+
+    Safe to call more than once, later calls only update the levels and keep
+    the listener and stream of the first one.
+    """
+    with _setup_lock:
+        return _setup_logging(levels, default_level, stream, fields_format)
+
+
+def _setup_logging(levels, default_level, stream, fields_format):
+    global _listener
+    root = logging.getLogger(ROOT_LOGGER)
+    root.setLevel(default_level or os.environ.get("LOG_LEVEL", "INFO"))
+    for component, level in _parse_levels(
+        levels if levels is not None else os.environ.get("LOG_LEVELS", "")
+    ).items():
+        get_logger(component).setLevel(level)
+    if _listener is not None:
+        return _listener
+
+    root.propagate = False
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+    log_queue = queue.SimpleQueue()
+    root.addHandler(_RecordQueueHandler(log_queue))
+
+    writer = logging.StreamHandler(stream or sys.stdout)
+    writer.setFormatter(
+        FieldsFormatter(fields_format or os.environ.get("LOG_FIELDS_FORMAT", "kv"))
+    )
+    _listener = logging.handlers.QueueListener(log_queue, writer)
+    _listener.start()
+    atexit.register(_listener.stop)
+    return _listener
+
+
+def get_logger(component) -> logging.Logger:
+    return logging.getLogger(f"{ROOT_LOGGER}.{component}")
+
+
+class SampledLogger:
+    """Logs one call in every_n, for per tick messages on the hot path.
+
+    Calls are counted per message, so how often one message is logged does
+    not depend on how often the others are.
+    """
+
+    def __init__(self, logger: logging.Logger, every_n=100):
+        self.logger = logger
+        self.every_n = every_n
+        self.counts = {}
+
+    def log(self, level, msg, *args, **kwargs):
+        if not self.logger.isEnabledFor(level):
+            return
+        count = self.counts.get(msg, 0) + 1
+        self.counts[msg] = count
+        if count % self.every_n == 1 or self.every_n == 1:
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
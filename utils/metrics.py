@@ -0,0 +1,179 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _latency_buckets_ns():
+    # 1-2-5 steps from 1us to 10s
+    buckets = []
+    scale = 1_000
+    while scale <= 10_000_000_000:
+        for step in (1, 2, 5):
+            buckets.append(step * scale)
+        scale *= 10
+    return buckets[:-2]
+
+
+LATENCY_BUCKETS_NS = _latency_buckets_ns()
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    """Fixed bucket latency histogram, observations are in nanoseconds.
+
+    Observing is a bisect and two additions, cheap enough to stay on in
+    production. Quantiles are estimated as the upper bound of the bucket
+    they fall in.
+    """
+
+    def __init__(self, name, labels=(), buckets_ns=LATENCY_BUCKETS_NS):
+        self.name = name
+        self.labels = labels
+        self.buckets_ns = buckets_ns
+        # Last slot counts everything above the largest bucket
+        self.counts = [0] * (len(buckets_ns) + 1)
+        self.count = 0
+        self.sum_ns = 0
+
+    def observe(self, value_ns):
+        self.counts[bisect_left(self.buckets_ns, value_ns)] += 1
+        self.count += 1
+        self.sum_ns += value_ns
+
+    def quantile(self, q):
+        """Estimated quantile in seconds"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets_ns, self.counts):
+            cumulative += count
+            if cumulative >= rank:
+                return bound / 1e9
+        return float("inf")
+
+    def render(self):
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets_ns, self.counts):
+            cumulative += count
+            labels = _label_text(self.labels + (("le", f"{bound / 1e9:g}"),))
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _label_text(self.labels + (("le", "+Inf"),))
+        lines.append(f"{self.name}_bucket{labels} {self.count}")
+
+        labels = _label_text(self.labels)
+        lines.append(f"{self.name}_sum{labels} {self.sum_ns / 1e9}")
+        lines.append(f"{self.name}_count{labels} {self.count}")
+        return lines
+
+    def render_quantiles(self):
+        lines = []
+        for q in (0.5, 0.99):
+            labels = _label_text(self.labels + (("quantile", q),))
+            lines.append(f"{self.name}_quantile{labels} {self.quantile(q)}")
+        return lines
+
+
+class Gauge:
+    """Value read lazily from a callback at export time"""
+
+    def __init__(self, name, labels, callback):
+        self.name = name
+        self.labels = labels
+        self.callback = callback
+
+    def render(self):
+        try:
+            value = self.callback()
+        except Exception:
+            return []
+        return [f"{self.name}{_label_text(self.labels)} {value}"]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def histogram(self, name, **labels) -> Histogram:
+        key = (name, tuple(sorted(labels.items())))
+        metric = self.metrics.get(key)
+        if metric is None:
+            with self.lock:
+                metric = self.metrics.setdefault(key, Histogram(name, key[1]))
+        return metric
+
+    def gauge(self, name, callback, **labels) -> Gauge:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.metrics[key] = Gauge(name, key[1], callback)
+        return self.metrics[key]
+
+    def render_prometheus(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+
+        lines = []
+        typed = set()
+        histograms = []
+        for metric in sorted(metrics, key=lambda metric: metric.name):
+            if metric.name not in typed:
+                kind = "histogram" if isinstance(metric, Histogram) else "gauge"
+                lines.append(f"# TYPE {metric.name} {kind}")
+                typed.add(metric.name)
+            lines.extend(metric.render())
+            if isinstance(metric, Histogram):
+                histograms.append(metric)
+
+        # p50/p99 estimates as their own gauge families
+        for metric in histograms:
+            if f"{metric.name}_quantile" not in typed:
+                lines.append(f"# TYPE {metric.name}_quantile gauge")
+                typed.add(f"{metric.name}_quantile")
+            lines.extend(metric.render_quantiles())
+        return "\n".join(lines) + "\n"
+
+    def write_to_file(self, path):
+        with open(path, "w") as f:
+            f.write(self.render_prometheus())
+
+    def start_file_exporter(self, path, interval_seconds=15):
+        def export():
+            while True:
+                time.sleep(interval_seconds)
+                self.write_to_file(path)
+
+        threading.Thread(target=export, daemon=True).start()
+
+    def start_http_server(self, port=9100, host="127.0.0.1"):
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = registry.render_prometheus().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
@@ -0,0 +1,141 @@
+import threading
+
+import pandas as pd
+
+from utils.tick_codec import END_OF_SESSION
+
+
+def _column(df: pd.DataFrame, column):
+    """Columns can be addressed by name or by position"""
+    if isinstance(column, int):
+        return df.iloc[:, column]
+    return df[column]
+
+
+def dataframe_to_arrays(
+    df: pd.DataFrame, epoch_column="epoch", price_column="ltp", volume_column=None
+):
+    """Epoch, price and volume float64 arrays, volume is None if not mapped"""
+    epochs = _column(df, epoch_column)
+    if pd.api.types.is_numeric_dtype(epochs):
+        epochs = epochs.to_numpy(dtype="float64")
+    else:
+        # Same convention as Timestamp.timestamp(): naive values are taken as UTC
+        epochs = (
+            pd.to_datetime(epochs).to_numpy(dtype="datetime64[ns]").astype("int64")
+            / 1e9
+        )
+    prices = _column(df, price_column).to_numpy(dtype="float64")
+    volumes = None
+    if volume_column is not None:
+        volumes = _column(df, volume_column).to_numpy(dtype="float64")
+    return epochs, prices, volumes
+
+
+def dataframe_to_ticks(
+    df: pd.DataFrame, epoch_column="epoch", price_column="ltp", volume_column=None
+):
+    """Convert a DataFrame to queue ticks in one vectorized pass"""
+    epochs, prices, volumes = dataframe_to_arrays(
+        df, epoch_column, price_column, volume_column
+    )
+
+    if volumes is None:
+        return [
+            {"epoch": epoch, "ltp": ltp}
+            for epoch, ltp in zip(epochs.tolist(), prices.tolist())
+        ]
+
+    return [
+        {"epoch": epoch, "ltp": ltp, "volume": volume}
+        for epoch, ltp, volume in zip(
+            epochs.tolist(), prices.tolist(), volumes.tolist()
+        )
+    ]
+
+
+def read_ticks(source, epoch_column="epoch", price_column="ltp", volume_column=None):
+    """Ticks from a DataFrame or a local Parquet/CSV file"""
+    if isinstance(source, str):
+        if source.endswith(".parquet"):
+            source = pd.read_parquet(source)
+        else:
+            source = pd.read_csv(source)
+    return dataframe_to_ticks(source, epoch_column, price_column, volume_column)
+
+
+class QueueLoader:
+    """Bulk loads a DataFrame of ticks into a queue.
+
+    Progress is available through loaded/total and the optional
+    progress_callback(loaded, total); ready is set once every tick is queued.
+    With end_of_session the end-of-session marker follows the last tick.
+    """
+
+    def __init__(
+        self,
+        queue,
+        df: pd.DataFrame,
+        epoch_column="epoch",
+        price_column="ltp",
+        volume_column=None,
+        chunk_size=50000,
+        clear=True,
+        progress_callback=None,
+        end_of_session=False,
+    ):
+        self.queue = queue
+        self.df = df
+        self.epoch_column = epoch_column
+        self.price_column = price_column
+        self.volume_column = volume_column
+        self.chunk_size = chunk_size
+        self.clear = clear
+        self.progress_callback = progress_callback
+        self.end_of_session = end_of_session
+
+        self.total = len(df)
+        self.loaded = 0
+        self.ready = threading.Event()
+        self.error = None
+
+    def load(self):
+        try:
+            if self.clear:
+                self.queue.remove_all()
+
+            ticks = dataframe_to_ticks(
+                self.df, self.epoch_column, self.price_column, self.volume_column
+            )
+            for start in range(0, len(ticks), self.chunk_size):
+                self.loaded += self.queue.push_many(
+                    ticks[start : start + self.chunk_size]
+                )
+                if self.progress_callback:
+                    self.progress_callback(self.loaded, self.total)
+            if self.end_of_session:
+                self.queue.push(END_OF_SESSION)
+        except Exception as e:
+            self.error = e
+            raise
+        finally:
+            self.ready.set()
+        return self.loaded
+
+    def start(self):
+        """Load in a background thread"""
+        threading.Thread(target=self.load, daemon=True).start()
+        return self
+
+    def wait(self, timeout=None):
+        """Block until loading finishes, re-raising any loading error"""
+        finished = self.ready.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return finished
+
+    @property
+    def progress(self):
+        if self.total == 0:
+            return 1.0
+        return self.loaded / self.total
@@ -0,0 +1,137 @@
+import os
+import threading
+
+import redis
+import redis.asyncio
+
+
+_pools = {}
+# max_connections and health_check_interval each pool was built with
+_pool_settings = {}
+_pools_lock = threading.Lock()
+
+
+def _pool_kwargs(
+    host, port, db, decode_responses, max_connections, health_check_interval
+):
+    if max_connections is None:
+        max_connections = int(os.environ.get("REDIS_MAX_CONNECTIONS", 50))
+    if health_check_interval is None:
+        health_check_interval = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+    return dict(
+        host=host,
+        port=port,
+        db=db,
+        decode_responses=decode_responses,
+        max_connections=max_connections,
+        health_check_interval=health_check_interval,
+        timeout=int(os.environ.get("REDIS_POOL_TIMEOUT", 20)),
+    )
+
+
+def get_connection_pool(
+    host=None,
+    port=None,
+    db=0,
+    decode_responses=True,
+    max_connections=None,
+    health_check_interval=None,
+    is_async=False,
+):
+    """Return the process-wide pool for the given connection parameters.
+
+    Queues, feeds and loaders pointing at the same server share one pool, so
+    the number of sockets stays bounded by max_connections however many
+    symbols are running. The pool blocks callers when it is exhausted instead
+    of opening more sockets. Async pools are kept apart from the sync ones,
+    they can only be used from the event loop that first uses them.
+
+    The first caller sizes the pool, a later caller asking for a different
+    max_connections or health_check_interval gets an exception.
+    """
+    host = host or os.environ["REDIS_HOST"]
+    port = int(port or os.environ["REDIS_PORT"])
+    key = (host, port, db, decode_responses, is_async)
+
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            settings = _pool_settings[key]
+            requested = (max_connections, health_check_interval)
+            if any(
+                value is not None and value != current
+                for value, current in zip(requested, settings)
+            ):
+                raise Exception(
+                    f"Redis pool for {key} already exists with max_connections, "
+                    f"health_check_interval {settings}, got {requested}"
+                )
+        else:
+            pool_class = (
+                redis.asyncio.BlockingConnectionPool
+                if is_async
+                else redis.BlockingConnectionPool
+            )
+            kwargs = _pool_kwargs(
+                host,
+                port,
+                db,
+                decode_responses,
+                max_connections,
+                health_check_interval,
+            )
+            pool = pool_class(**kwargs)
+            _pools[key] = pool
+            _pool_settings[key] = (
+                kwargs["max_connections"],
+                kwargs["health_check_interval"],
+            )
+        return pool
+
+
+def get_redis(**pool_configs) -> redis.Redis:
+    """Build a client backed by the shared pool"""
+    return redis.Redis(connection_pool=get_connection_pool(**pool_configs))
+
+
+def get_async_redis(**pool_configs) -> redis.asyncio.Redis:
+    """Build an asyncio client backed by the shared async pool"""
+    return redis.asyncio.Redis(
+        connection_pool=get_connection_pool(is_async=True, **pool_configs)
+    )
+
+
+def get_dedicated_async_redis(
+    host=None,
+    port=None,
+    db=0,
+    decode_responses=True,
+    max_connections=None,
+    health_check_interval=None,
+) -> redis.asyncio.Redis:
+    """Build an asyncio client with a connection of its own.
+
+    Meant for blocking commands, a BRPOP holds its connection for the whole
+    wait and would keep it from every other consumer of a shared pool. Takes
+    the same settings as get_connection_pool, max_connections is unused.
+    """
+    if health_check_interval is None:
+        health_check_interval = int(os.environ.get("REDIS_HEALTH_CHECK_INTERVAL", 30))
+    return redis.asyncio.Redis(
+        host=host or os.environ["REDIS_HOST"],
+        port=int(port or os.environ["REDIS_PORT"]),
+        db=db,
+        decode_responses=decode_responses,
+        health_check_interval=health_check_interval,
+        single_connection_client=True,
+    )
+
+
+def close_all_pools():
+    with _pools_lock:
+        for key, pool in _pools.items():
+            # Async pools have to be closed from their own event loop
+            if not key[-1]:
+                pool.disconnect()
+        _pools.clear()
+        _pool_settings.clear()
@@ -1,24 +1,153 @@
-import redis
-import os
-import json
+import time
+
+from utils.redis_pool import get_redis
+from utils.tick_codec import get_codec
+
+
+# Pushes only if the whole batch fits, returns -1 when it does not
+PUSH_IF_ROOM = """
+local maxlen = tonumber(table.remove(ARGV, 1))
+if redis.call('LLEN', KEYS[1]) + #ARGV > maxlen then
+    return -1
+end
+return redis.call('LPUSH', KEYS[1], unpack(ARGV))
+"""
+
+
+class QueueFull(Exception):
+    """pushed counts the items queued by the call before it was refused"""
+
+    def __init__(self, message, pushed=0):
+        super().__init__(message)
+        self.pushed = pushed
 
 
 class RedisQueue:
-    def __init__(self, name, namespace="queue"):
+    OVERFLOW_POLICIES = ("DROP_OLDEST", "BLOCK", "REJECT")
+
+    def __init__(
+        self,
+        name,
+        namespace="queue",
+        codec="JSON",
+        maxlen=None,
+        overflow_policy="DROP_OLDEST",
+        block_timeout=None,
+        client=None,
+        **pool_configs,
+    ):
+        self.name = name
+        self.namespace = namespace
         self.key = f"{namespace}:{name}"
-        self.redis = redis.Redis(
-            decode_responses=True,
-            host=os.environ["REDIS_HOST"],
-            port=os.environ["REDIS_PORT"],
+        self.codec = get_codec(codec)
+        self.pool_configs = pool_configs
+        # An explicit client, e.g. a local stand-in, bypasses the shared pools
+        self.redis = client or get_redis(
+            decode_responses=self.codec.decode_responses, **pool_configs
         )
 
+        if overflow_policy not in self.OVERFLOW_POLICIES:
+            raise Exception(f"Invalid overflow policy: {overflow_policy}")
+        self.maxlen = maxlen
+        self.overflow_policy = overflow_policy
+        # How long a BLOCK producer waits for room, None waits forever
+        self.block_timeout = block_timeout
+        self.push_if_room = self.redis.register_script(PUSH_IF_ROOM)
+
+        self.high_water_mark = 0
+        self.dropped = 0
+        self.rejected = 0
+
     def push(self, item):
         """Push item to the left side of the queue"""
-        self.redis.lpush(self.key, json.dumps(item))
+        self._push_batch([self.codec.encode(item)])
+
+    def push_many(self, items, batch_size=5000):
+        """Push items in order, batch_size values per pipelined LPUSH.
+
+        With REJECT or BLOCK the batches before a QueueFull stay queued, its
+        pushed tells how many, so a retry starts at items[pushed:].
+        """
+        encode = self.codec.encode
+        if self.maxlen is not None:
+            batch_size = min(batch_size, self.maxlen)
+
+        if self.maxlen is not None and self.overflow_policy != "DROP_OLDEST":
+            # Every batch needs its own answer before the next one is sent
+            for start in range(0, len(items), batch_size):
+                batch = items[start : start + batch_size]
+                try:
+                    self._push_batch([encode(item) for item in batch])
+                except QueueFull as e:
+                    e.pushed = start
+                    self.rejected += len(items) - start - len(batch)
+                    raise
+            return len(items)
+
+        pipe = self.redis.pipeline(transaction=False)
+        for start in range(0, len(items), batch_size):
+            pipe.lpush(
+                self.key, *[encode(item) for item in items[start : start + batch_size]]
+            )
+            if self.maxlen is not None:
+                pipe.ltrim(self.key, 0, self.maxlen - 1)
+        results = pipe.execute()
+        for length in results[:: 1 if self.maxlen is None else 2]:
+            self._record_length(length)
+        return len(items)
+
+    def _push_batch(self, values):
+        if self.maxlen is None:
+            self._record_length(self.redis.lpush(self.key, *values))
+        elif self.overflow_policy == "DROP_OLDEST":
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.lpush(self.key, *values)
+            pipe.ltrim(self.key, 0, self.maxlen - 1)
+            self._record_length(pipe.execute()[0])
+        else:
+            wait = 0.001
+            started = time.monotonic()
+            while True:
+                length = self.push_if_room(
+                    keys=[self.key], args=[self.maxlen, *values]
+                )
+                if length >= 0:
+                    self._record_length(length)
+                    return
+                if self.overflow_policy == "REJECT" or (
+                    self.block_timeout is not None
+                    and time.monotonic() - started >= self.block_timeout
+                ):
+                    self.rejected += len(values)
+                    raise QueueFull(f"Queue {self.key} is full ({self.maxlen})")
+                time.sleep(wait)
+                wait = min(wait * 2, 0.1)
+
+    def _record_length(self, length):
+        if self.maxlen is not None and length > self.maxlen:
+            self.dropped += length - self.maxlen
+            length = self.maxlen
+        if length > self.high_water_mark:
+            self.high_water_mark = length
 
     def pop(self):
         """Pop item from the right side (FIFO)"""
-        return json.loads(self.redis.rpop(self.key))
+        return self.codec.decode(self.redis.rpop(self.key))
+
+    def pop_many(self, count):
+        """Pop up to count items from the right side (FIFO) in one round trip"""
+        items = self.redis.rpop(self.key, count)
+        if not items:
+            return []
+        decode = self.codec.decode
+        return [decode(item) for item in items]
+
+    def blocking_pop(self, timeout=1):
+        """Wait up to timeout seconds for an item on the right side (FIFO)"""
+        item = self.redis.brpop(self.key, timeout=timeout)
+        if item is None:
+            return None
+        return self.codec.decode(item[1])
 
     def is_empty(self):
         """Check if the queue is empty"""
@@ -26,8 +155,28 @@ class RedisQueue:
 
     def size(self):
         """Get current queue size"""
-        return self.redis.llen(self.key)
+        length = self.redis.llen(self.key)
+        if length > self.high_water_mark:
+            self.high_water_mark = length
+        return length
+
+    def depth_stats(self):
+        """Current depth plus the high-water mark seen by this instance"""
+        return {
+            "size": self.size(),
+            "high_water_mark": self.high_water_mark,
+            "maxlen": self.maxlen,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+        }
 
     def remove_all(self):
-        while not self.is_empty():
-            self.redis.rpop(self.key)
+        self.redis.delete(self.key)
+
+    def as_async(self):
+        """Consumer side asyncio view of the same queue"""
+        from utils.async_redis_queue import AsyncRedisQueue
+
+        return AsyncRedisQueue(
+            self.name, self.namespace, codec=self.codec, **self.pool_configs
+        )
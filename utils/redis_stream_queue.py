@@ -0,0 +1,150 @@
+import time
+from collections import deque
+
+import redis
+
+from utils.redis_pool import get_redis
+from utils.tick_codec import get_codec
+
+
+class RedisStreamQueue:
+    """Stream backed queue, a drop-in for RedisQueue on the consumer side.
+
+    Reads go through a consumer group, so every group sees every tick and
+    several bots can follow the same symbol. Entries handed out by one read
+    are acknowledged with the next read; after a restart the consumer first
+    replays whatever it had read but not acknowledged, then continues with
+    new entries.
+    """
+
+    def __init__(
+        self,
+        name,
+        namespace="stream",
+        codec="JSON",
+        group="default",
+        consumer="main",
+        maxlen=None,
+        start_id="0",
+        read_count=100,
+        **pool_configs,
+    ):
+        self.key = f"{namespace}:{name}"
+        self.codec = get_codec(codec)
+        self.redis = get_redis(
+            decode_responses=self.codec.decode_responses, **pool_configs
+        )
+        self.field = "d" if self.codec.decode_responses else b"d"
+        self.group = group
+        self.consumer = consumer
+        self.maxlen = maxlen
+        self.read_count = read_count
+
+        self.buffer = deque()
+        self.unacked_ids = []
+        # "0" replays our pending entries first, ">" asks for new ones
+        self.read_id = "0"
+
+        try:
+            self.redis.xgroup_create(self.key, group, id=start_id, mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def push(self, item):
+        """Append item to the stream"""
+        self.redis.xadd(
+            self.key,
+            {self.field: self.codec.encode(item)},
+            maxlen=self.maxlen,
+            approximate=True,
+        )
+
+    def push_many(self, items, batch_size=5000):
+        """Append items in order, batch_size XADDs per pipeline round trip"""
+        encode = self.codec.encode
+        for start in range(0, len(items), batch_size):
+            pipe = self.redis.pipeline(transaction=False)
+            for item in items[start : start + batch_size]:
+                pipe.xadd(
+                    self.key,
+                    {self.field: encode(item)},
+                    maxlen=self.maxlen,
+                    approximate=True,
+                )
+            pipe.execute()
+        return len(items)
+
+    def pop(self):
+        """Pop the next unread item for this consumer"""
+        if not self.buffer:
+            self._read(self.read_count)
+        return self.buffer.popleft()
+
+    def pop_many(self, count):
+        """Pop up to count unread items in one round trip"""
+        if not self.buffer:
+            self._read(count)
+        items = []
+        while self.buffer and len(items) < count:
+            items.append(self.buffer.popleft())
+        return items
+
+    def blocking_pop(self, timeout=1):
+        """Wait up to timeout seconds for the next unread item"""
+        if not self.buffer:
+            self._read(self.read_count, block=int(timeout * 1000))
+        if self.buffer:
+            return self.buffer.popleft()
+        return None
+
+    def is_empty(self):
+        """Check if there is nothing left to read for this consumer"""
+        if not self.buffer:
+            self._read(self.read_count)
+        return not self.buffer
+
+    def size(self):
+        """Get current stream length (all groups)"""
+        return self.redis.xlen(self.key)
+
+    def remove_all(self):
+        self.redis.xtrim(self.key, maxlen=0)
+
+    def trim(self, maxlen=None, max_age_seconds=None):
+        """Trim the stream by length and/or by entry age"""
+        if maxlen is not None:
+            self.redis.xtrim(self.key, maxlen=maxlen, approximate=True)
+        if max_age_seconds is not None:
+            min_ms = int((time.time() - max_age_seconds) * 1000)
+            self.redis.xtrim(self.key, minid=f"{min_ms}-0", approximate=True)
+
+    def _read(self, count, block=None):
+        pipe = self.redis.pipeline(transaction=False)
+        if self.unacked_ids:
+            pipe.xack(self.key, self.group, *self.unacked_ids)
+        if self.read_id == ">":
+            pipe.xreadgroup(
+                self.group, self.consumer, {self.key: ">"}, count=count, block=block
+            )
+        else:
+            pipe.xreadgroup(
+                self.group, self.consumer, {self.key: self.read_id}, count=count
+            )
+        response = pipe.execute()[-1]
+        self.unacked_ids = []
+
+        entries = response[0][1] if response else []
+        if self.read_id != ">":
+            if not entries:
+                # Pending backlog replayed, switch over to new entries
+                self.read_id = ">"
+                return self._read(count, block)
+            self.read_id = entries[-1][0]
+
+        decode = self.codec.decode
+        for entry_id, fields in entries:
+            self.unacked_ids.append(entry_id)
+            # Pending entries that were trimmed away come back without fields
+            if fields:
+                self.buffer.append(decode(fields[self.field]))
@@ -1,54 +1,205 @@
-from datetime import datetime, timedelta
+from datetime import datetime
+
+import numpy as np
+
 from models import FeedData
 
+BAR_KEYS = ("timestamp", "open", "high", "low", "close", "volume", "ticks")
+BAR_DTYPE = np.dtype(
+    [
+        ("timestamp", "<i8"),
+        ("open", "<f8"),
+        ("high", "<f8"),
+        ("low", "<f8"),
+        ("close", "<f8"),
+        ("volume", "<f8"),
+        ("ticks", "<i8"),
+    ]
+)
+
+
+class Bar:
+    """One OHLCV bar, timestamp is the bar start in epoch nanoseconds"""
+
+    __slots__ = BAR_KEYS
+
+    def __init__(self):
+        self.reset(0, 0.0, 0.0)
+
+    def reset(self, timestamp, price, volume):
+        self.timestamp = timestamp
+        self.open = price
+        self.high = price
+        self.low = price
+        self.close = price
+        self.volume = volume
+        self.ticks = 1
+
+    def as_tuple(self):
+        return (
+            self.timestamp,
+            self.open,
+            self.high,
+            self.low,
+            self.close,
+            self.volume,
+            self.ticks,
+        )
+
+    # Dict style access, bars used to be dicts
+    def __getitem__(self, key):
+        return getattr(self, key)
+
+    def __repr__(self):
+        return (
+            f"Bar(timestamp={self.timestamp}, open={self.open}, high={self.high}, "
+            f"low={self.low}, close={self.close}, volume={self.volume}, "
+            f"ticks={self.ticks})"
+        )
+
 
 class DataResampler:
-    def __init__(self, timeframe_seconds=60):
-        self.timeframe = timedelta(seconds=timeframe_seconds)
-        self.current_bar = None
+    """Time bar resampler with a bounded bar history.
+
+    The open bar and the last completed bar are two preallocated Bar objects
+    updated in place, they are only valid until the next bar completes.
+    Completed bars are also written into a ring of history_size slots. The
+    ring is stored twice back to back, so the last K bars are always one
+    contiguous slice and get_last_bars returns a view without copying.
+
+    Bars are aligned on the local wall clock, so an hourly bar starts at
+    09:00 and not at 09:30 in IST. utc_offset_seconds defaults to the local
+    offset when the resampler is built, set it to anchor bars elsewhere.
+    """
+
+    def __init__(
+        self, timeframe_seconds=60, history_size=1000, utc_offset_seconds=None
+    ):
+        if history_size < 1:
+            raise ValueError(f"history_size must be at least 1, got {history_size}")
+        # Timestamps are epoch nanoseconds
+        self.timeframe_ns = int(timeframe_seconds * 1e9)
+        if utc_offset_seconds is None:
+            utc_offset_seconds = datetime.now().astimezone().utcoffset().total_seconds()
+        self.offset_ns = int(utc_offset_seconds * 1e9)
+        self.history_size = history_size
+        self.history = np.zeros(2 * history_size, dtype=BAR_DTYPE)
+        self.completed = 0
+
+        self.current_bar = Bar()
+        self.prev_bar = Bar()
         self.current_start = None
-        self.ohlcv = []
 
-    def _get_bar_start_time(self, timestamp):
-        return timestamp - timedelta(
-            seconds=timestamp.second % self.timeframe.total_seconds(),
-            microseconds=timestamp.microsecond,
-        )
+    def _get_bar_start_time(self, epoch_ns):
+        return epoch_ns - (epoch_ns + self.offset_ns) % self.timeframe_ns
 
     def update(self, feed_data: FeedData):
-        dt = feed_data.datetime
         price = feed_data.close
-
-        bar_start_time = self._get_bar_start_time(dt)
-        # print(bar_start_time)
+        bar_start_time = self._get_bar_start_time(feed_data.epoch_ns)
 
         # New bar starts
         if self.current_start != bar_start_time:
-            if self.current_bar:
-                self.ohlcv.append(self.current_bar)
-                # print("Completed bar:", self.current_bar)
+            if self.current_start is not None:
+                self._complete(self.current_bar.as_tuple())
+                self.current_bar, self.prev_bar = self.prev_bar, self.current_bar
 
             self.current_start = bar_start_time
-            self.current_bar = {
-                "timestamp": bar_start_time,
-                "open": price,
-                "high": price,
-                "low": price,
-                "close": price,
-            }
+            self.current_bar.reset(bar_start_time, price, feed_data.volume)
         else:
             # Update current bar
-            self.current_bar["high"] = max(self.current_bar["high"], price)
-            self.current_bar["low"] = min(self.current_bar["low"], price)
-            self.current_bar["close"] = price
+            bar = self.current_bar
+            if price > bar.high:
+                bar.high = price
+            elif price < bar.low:
+                bar.low = price
+            bar.close = price
+            bar.volume += feed_data.volume
+            bar.ticks += 1
+
+    def _complete(self, row):
+        slot = self.completed % self.history_size
+        self.history[slot] = row
+        self.history[slot + self.history_size] = row
+        self.completed += 1
+
+    def update_batch(self, epoch_ns, prices, volumes=None):
+        """Vectorized update over tick arrays, same bars as update per tick.
+
+        Returns the bars completed by these ticks as start, open, high, low,
+        close and volume arrays, plus the index of the tick that completed
+        each of them. The last bar stays open as current_bar.
+        """
+        if len(epoch_ns) == 0:
+            return None
+        if volumes is None:
+            volumes = np.zeros(len(prices))
+        starts = epoch_ns - (epoch_ns + self.offset_ns) % self.timeframe_ns
+        firsts = np.flatnonzero(starts[1:] != starts[:-1]) + 1
+        firsts = np.concatenate(([0], firsts))
+        bars = [
+            starts[firsts],
+            prices[firsts],
+            np.maximum.reduceat(prices, firsts),
+            np.minimum.reduceat(prices, firsts),
+            prices[np.append(firsts[1:], len(prices)) - 1],
+            np.add.reduceat(volumes, firsts),
+            np.diff(np.append(firsts, len(prices))),
+        ]
+
+        current = self.current_bar
+        if self.current_start is not None and current.timestamp == bars[0][0]:
+            # First run of ticks continues the open bar
+            bars[1][0] = current.open
+            bars[2][0] = max(bars[2][0], current.high)
+            bars[3][0] = min(bars[3][0], current.low)
+            bars[5][0] += current.volume
+            bars[6][0] += current.ticks
+        elif self.current_start is not None:
+            bars = [
+                np.concatenate(([value], column))
+                for value, column in zip(current.as_tuple(), bars)
+            ]
+
+        count = len(bars[0]) - 1
+        if count:
+            # Only the last history_size bars fit in the ring
+            kept = min(count, self.history_size)
+            rows = np.empty(kept, dtype=BAR_DTYPE)
+            for key, column in zip(BAR_KEYS, bars):
+                rows[key] = column[count - kept : count]
+            first = self.completed + count - kept
+            slots = (first + np.arange(kept)) % self.history_size
+            self.history[slots] = rows
+            self.history[slots + self.history_size] = rows
+            self.completed += count
+            for key, column in zip(BAR_KEYS, bars):
+                setattr(self.prev_bar, key, column[count - 1].item())
+
+        for key, column in zip(BAR_KEYS, bars):
+            setattr(self.current_bar, key, column[-1].item())
+        self.current_start = self.current_bar.timestamp
+        # A bar is completed by the first tick of the bar after it
+        closing = firsts[len(firsts) - count :]
+        return [column[:count] for column in bars[:6]] + [closing]
 
     def get_current_bar(self):
+        if self.current_start is None:
+            return None
         return self.current_bar
 
     def get_prev_bar(self):
-        if len(self.ohlcv) > 0:
-            return self.ohlcv[-1]
-        return None
+        if self.completed == 0:
+            return None
+        return self.prev_bar
+
+    def get_last_bars(self, k):
+        """The last k completed bars, oldest first, as a view into the ring.
+
+        The view is overwritten as new bars complete, copy it to keep it.
+        """
+        k = min(k, self.completed, self.history_size)
+        end = (self.completed - 1) % self.history_size + self.history_size + 1
+        return self.history[end - k : end]
 
 
 # Example usage:
@@ -58,11 +209,9 @@ if __name__ == "__main__":
 
     aggregator = DataResampler(timeframe_seconds=5)
 
-    now = datetime.now()
+    now = time.time_ns()
     for i in range(120):  # simulate 2 minutes of ticks
-        tick = {
-            "epoch": now + timedelta(seconds=i),
-            "ltp": 100 + random.uniform(-1, 1),
-        }
+        ltp = 100 + random.uniform(-1, 1)
+        tick = FeedData(now + i * 1_000_000_000, ltp, ltp, ltp, ltp, 0, "EXAMPLE")
         aggregator.update(tick)
         time.sleep(0.01)  # simulate time delay in streaming
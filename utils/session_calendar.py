@@ -0,0 +1,113 @@
+from datetime import datetime, time, timedelta
+
+from dateutil import parser
+
+
+class SessionCalendar:
+    """Trading session calendar answering "in session?" for epoch seconds.
+
+    All strings are parsed once when the calendar is built. Per tick only
+    float comparisons happen, the session windows of the current day are
+    converted to epochs once per day. Times are local, same as
+    datetime.fromtimestamp.
+
+    Config keys, all optional:
+        start_time / end_time: absolute bounds, e.g. "2025-04-21 09:00"
+        sessions: daily windows, e.g. [["09:15", "11:30"], ["12:30", "15:30"]]
+        holidays: dates with no session, e.g. ["2025-05-01"]
+        half_days: dates with their own windows, e.g. {"2025-10-21": [...]}
+        weekdays: trading weekdays, Monday is 0. Defaults to Monday-Friday
+            for calendars with sessions, holidays or half_days, and to every
+            day for plain start_time / end_time windows
+    """
+
+    def __init__(
+        self,
+        start_time=None,
+        end_time=None,
+        sessions=None,
+        holidays=None,
+        half_days=None,
+        weekdays=None,
+    ):
+        self.start_epoch = (
+            parser.parse(start_time).timestamp() if start_time else float("-inf")
+        )
+        self.end_epoch = (
+            parser.parse(end_time).timestamp() if end_time else float("inf")
+        )
+
+        self.sessions = self._parse_windows(sessions or [])
+        self.holidays = {parser.parse(day).date() for day in holidays or []}
+        self.half_days = {
+            parser.parse(day).date(): self._parse_windows(windows)
+            for day, windows in (half_days or {}).items()
+        }
+        if weekdays is None:
+            weekly = sessions or holidays or half_days
+            weekdays = (0, 1, 2, 3, 4) if weekly else range(7)
+        self.weekdays = set(weekdays)
+
+        # Session windows of the day last looked up, as epoch seconds
+        self.day_start = 0.0
+        self.day_end = 0.0
+        self.day_windows = []
+
+    @classmethod
+    def from_config(cls, session_time):
+        """Calendar for a config dict, None for an empty one.
+
+        Callers treat a missing calendar as never in session.
+        """
+        if isinstance(session_time, SessionCalendar):
+            return session_time
+        if not session_time:
+            return None
+        return cls(**session_time)
+
+    def is_in_session(self, epoch: float) -> bool:
+        if epoch < self.start_epoch or epoch > self.end_epoch:
+            return False
+        if (
+            not self.sessions
+            and not self.half_days
+            and not self.holidays
+            and len(self.weekdays) == 7
+        ):
+            return True
+
+        if not (self.day_start <= epoch < self.day_end):
+            self._load_day(epoch)
+        for start, end in self.day_windows:
+            if start <= epoch <= end:
+                return True
+        return False
+
+    def _load_day(self, epoch):
+        day = datetime.fromtimestamp(epoch).date()
+        self.day_start = datetime.combine(day, time()).timestamp()
+        self.day_end = datetime.combine(day + timedelta(days=1), time()).timestamp()
+
+        if day in self.half_days:
+            windows = self.half_days[day]
+        elif day in self.holidays or day.weekday() not in self.weekdays:
+            windows = []
+        elif self.sessions:
+            windows = self.sessions
+        else:
+            windows = [(time(), time.max)]
+
+        self.day_windows = [
+            (
+                datetime.combine(day, start).timestamp(),
+                datetime.combine(day, end).timestamp(),
+            )
+            for start, end in windows
+        ]
+
+    @staticmethod
+    def _parse_windows(windows):
+        return [
+            (parser.parse(start).time(), parser.parse(end).time())
+            for start, end in windows
+        ]
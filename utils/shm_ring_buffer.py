@@ -0,0 +1,213 @@
+import os
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+from utils.tick_codec import MARKERS, layout_epoch
+
+
+TICK_DTYPE = np.dtype([("epoch", "<f8"), ("ltp", "<f8"), ("volume", "<f8")])
+# write sequence, capacity, claimed sequence
+HEADER_DTYPE = np.dtype("<i8")
+HEADER_SIZE = 3 * HEADER_DTYPE.itemsize
+
+
+def _attach(name):
+    """Open an existing segment without taking ownership of it"""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # Before Python 3.13 attaching registers the segment with the
+        # resource tracker, which would unlink it when this process exits
+        shm = shared_memory.SharedMemory(name=name)
+        if os.name == "posix":
+            resource_tracker.unregister(f"/{shm.name}", "shared_memory")
+        return shm
+
+
+def _unlink(shm):
+    # Readers forked from the owner share its resource tracker and may have
+    # unregistered the segment on attach, unlink expects it registered
+    if os.name == "posix":
+        resource_tracker.register(f"/{shm.name}", "shared_memory")
+    shm.unlink()
+
+
+class ShmTickRing:
+    """Fixed-slot tick ring buffer in shared memory.
+
+    A single producer writes slots and then publishes them by bumping the
+    write sequence in the header. Any number of consumers, in any process on
+    the host, keep their own read sequence and copy slots out. A consumer
+    that falls more than capacity ticks behind skips ahead and the skipped
+    ticks are counted in dropped.
+
+    Before writing, the producer claims the sequence it writes up to. Readers
+    check the claim again after copying, like a seqlock, and drop ticks the
+    producer may have overwritten meanwhile instead of returning torn ones.
+    """
+
+    def __init__(self, name, capacity=None, create=False, start="oldest"):
+        if create:
+            if not capacity:
+                raise Exception("Capacity is required to create a ring buffer")
+            size = HEADER_SIZE + capacity * TICK_DTYPE.itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+
+        self.name = name
+        self.is_owner = create
+        self.header = np.ndarray((3,), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if create:
+            self.header[:] = (0, capacity, 0)
+        self.capacity = int(self.header[1])
+        self.slots = np.ndarray(
+            (self.capacity,), dtype=TICK_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE
+        )
+
+        write_seq = int(self.header[0])
+        if start == "latest":
+            self.read_seq = write_seq
+        else:
+            self.read_seq = max(0, write_seq - self.capacity)
+        self.dropped = 0
+
+    # Producer side
+    def push(self, item):
+        seq = int(self.header[0])
+        self.header[2] = seq + 1
+        epoch = layout_epoch(item)
+        if epoch in MARKERS:
+            self.slots[seq % self.capacity] = (epoch, 0.0, 0.0)
+        else:
+            self.slots[seq % self.capacity] = (
+                epoch,
+                item["ltp"],
+                item.get("volume", 0),
+            )
+        self.header[0] = seq + 1
+
+    def push_many(self, items):
+        if not items:
+            return 0
+        count = len(items)
+        epochs = np.fromiter((layout_epoch(item) for item in items), "f8", count)
+        ltps = np.fromiter((item.get("ltp", 0) for item in items), "f8", count)
+        volumes = np.fromiter((item.get("volume", 0) for item in items), "f8", count)
+        return self.push_arrays(epochs, ltps, volumes)
+
+    def push_arrays(self, epochs, ltps, volumes):
+        """Write whole arrays, wrapping around the end of the ring"""
+        count = len(epochs)
+        # Only the last capacity ticks can survive the write anyway
+        first = max(0, count - self.capacity)
+        seq = int(self.header[0]) + first
+        self.header[2] = seq + count - first
+        index = first
+        while index < count:
+            slot = seq % self.capacity
+            length = min(count - index, self.capacity - slot)
+            target = self.slots[slot : slot + length]
+            target["epoch"] = epochs[index : index + length]
+            target["ltp"] = ltps[index : index + length]
+            target["volume"] = volumes[index : index + length]
+            seq += length
+            index += length
+        self.header[0] = seq
+        return count
+
+    # Consumer side
+    def read(self, max_count):
+        """Copy out up to max_count unread ticks"""
+        write_seq = int(self.header[0])
+        # Slots below claimed - capacity are being or about to be rewritten
+        self._skip_to(int(self.header[2]) - self.capacity)
+
+        slot = self.read_seq % self.capacity
+        length = max(
+            0, min(write_seq - self.read_seq, max_count, self.capacity - slot)
+        )
+        ticks = self.slots[slot : slot + length].copy()
+
+        # Anything the producer claimed during the copy may have torn it
+        overwritten = int(self.header[2]) - self.capacity - self.read_seq
+        self.read_seq += length
+        if overwritten > 0:
+            overwritten = min(overwritten, length)
+            self.dropped += overwritten
+            ticks = ticks[overwritten:]
+        return ticks
+
+    def _skip_to(self, seq):
+        if seq > self.read_seq:
+            self.dropped += seq - self.read_seq
+            self.read_seq = seq
+
+    def pop_many(self, count):
+        return [
+            MARKERS[epoch]
+            if epoch in MARKERS
+            else {"epoch": epoch, "ltp": ltp, "volume": volume}
+            for epoch, ltp, volume in self.read(count).tolist()
+        ]
+
+    def pop(self):
+        return self.pop_many(1)[0]
+
+    def is_empty(self):
+        return int(self.header[0]) == self.read_seq
+
+    def size(self):
+        return max(0, min(int(self.header[0]) - self.read_seq, self.capacity))
+
+    def remove_all(self):
+        self.read_seq = int(self.header[0])
+
+    def close(self):
+        del self.header, self.slots
+        self.shm.close()
+        if self.is_owner:
+            _unlink(self.shm)
+
+
+class ShmTickSeries:
+    """A whole tick series published once in shared memory.
+
+    The creator copies the epoch, ltp and volume arrays in, any process on
+    the host can then attach by name and read the columns in place.
+    """
+
+    def __init__(self, name, length=None, create=False):
+        if create:
+            size = HEADER_SIZE + max(length, 1) * TICK_DTYPE.itemsize
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+
+        self.name = name
+        self.is_owner = create
+        self.header = np.ndarray((3,), dtype=HEADER_DTYPE, buffer=self.shm.buf)
+        if create:
+            self.header[:] = (length, length, length)
+        self.length = int(self.header[0])
+        self.ticks = np.ndarray(
+            (self.length,), dtype=TICK_DTYPE, buffer=self.shm.buf, offset=HEADER_SIZE
+        )
+
+    @classmethod
+    def from_arrays(cls, name, epochs, ltps, volumes=None):
+        series = cls(name, length=len(epochs), create=True)
+        series.ticks["epoch"] = epochs
+        series.ticks["ltp"] = ltps
+        series.ticks["volume"] = 0.0 if volumes is None else volumes
+        return series
+
+    def columns(self):
+        return {column: self.ticks[column] for column in TICK_DTYPE.names}
+
+    def close(self):
+        del self.header, self.ticks
+        self.shm.close()
+        if self.is_owner:
+            _unlink(self.shm)
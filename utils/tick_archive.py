@@ -0,0 +1,97 @@
+import os
+from array import array
+from datetime import date, datetime, time, timedelta
+
+import numpy as np
+
+# One raw little-endian float64 file per column
+COLUMNS = ("epoch", "ltp", "volume")
+
+
+def _symbol_dir(root, symbol):
+    return os.path.join(root, symbol.replace(":", "_").replace("/", "_"))
+
+
+class TickArchiveWriter:
+    """Appends ticks to a columnar on-disk archive.
+
+    Ticks are partitioned as <root>/<symbol>/<YYYY-MM-DD>/<column>.f8 by the
+    local date of their epoch, every column is a flat float64 array so the
+    files can be memory-mapped back without any parsing.
+    """
+
+    def __init__(self, root, symbol, flush_every=1000):
+        self.root = root
+        self.symbol = symbol
+        self.flush_every = flush_every
+        self.day = None
+        self.day_start = 0.0
+        self.day_end = 0.0
+        self.buffers = {column: array("d") for column in COLUMNS}
+
+    def append(self, epoch, ltp, volume=0.0):
+        if not (self.day_start <= epoch < self.day_end):
+            self._switch_day(epoch)
+        self.buffers["epoch"].append(epoch)
+        self.buffers["ltp"].append(ltp)
+        self.buffers["volume"].append(volume)
+        if len(self.buffers["epoch"]) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self.day is None or not self.buffers["epoch"]:
+            return
+        day_dir = os.path.join(_symbol_dir(self.root, self.symbol), str(self.day))
+        os.makedirs(day_dir, exist_ok=True)
+        _align_columns(day_dir)
+        for column, values in self.buffers.items():
+            with open(os.path.join(day_dir, f"{column}.f8"), "ab") as f:
+                values.tofile(f)
+            del values[:]
+
+    def close(self):
+        self.flush()
+
+    def _switch_day(self, epoch):
+        self.flush()
+        day = datetime.fromtimestamp(epoch).date()
+        self.day = day
+        self.day_start = datetime.combine(day, time()).timestamp()
+        self.day_end = datetime.combine(day + timedelta(days=1), time()).timestamp()
+
+
+def _align_columns(day_dir):
+    """Truncate every column file to the rows present in all of them.
+
+    A flush appends to one file after the other, a crash in between leaves
+    columns of different lengths and every later append would then pair up
+    rows at different offsets.
+    """
+    paths = [os.path.join(day_dir, f"{column}.f8") for column in COLUMNS]
+    sizes = [os.path.getsize(path) if os.path.exists(path) else 0 for path in paths]
+    size = min(sizes) // 8 * 8
+    for path, path_size in zip(paths, sizes):
+        if path_size > size:
+            os.truncate(path, size)
+
+
+def list_days(root, symbol):
+    symbol_dir = _symbol_dir(root, symbol)
+    if not os.path.isdir(symbol_dir):
+        return []
+    return sorted(date.fromisoformat(day) for day in os.listdir(symbol_dir))
+
+
+def load_day(root, symbol, day):
+    """Memory-map one day of a symbol, returns epoch, ltp and volume arrays"""
+    day_dir = os.path.join(_symbol_dir(root, symbol), str(day))
+    arrays = []
+    for column in COLUMNS:
+        path = os.path.join(day_dir, f"{column}.f8")
+        if os.path.getsize(path) == 0:
+            arrays.append(np.empty(0, dtype="<f8"))
+        else:
+            arrays.append(np.memmap(path, dtype="<f8", mode="r"))
+    # A writer may be mid-flush, only expose rows present in every column
+    length = min(len(values) for values in arrays)
+    return tuple(values[:length] for values in arrays)
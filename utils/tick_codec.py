@@ -0,0 +1,69 @@
+import json
+import struct
+
+# Pushed by a producer after the last tick of a session
+END_OF_SESSION = {"eos": True}
+# Pushed by a producer that is alive but has no ticks to send, consumers
+# count it as activity and drop it
+HEARTBEAT = {"heartbeat": True}
+# Same markers for fixed layouts that only carry numbers
+END_OF_SESSION_EPOCH = -1.0
+HEARTBEAT_EPOCH = -2.0
+
+MARKERS = {END_OF_SESSION_EPOCH: END_OF_SESSION, HEARTBEAT_EPOCH: HEARTBEAT}
+
+
+def layout_epoch(item):
+    """Epoch a fixed layout stores for item, markers get their own"""
+    if item.get("eos"):
+        return END_OF_SESSION_EPOCH
+    if item.get("heartbeat"):
+        return HEARTBEAT_EPOCH
+    return item["epoch"]
+
+
+class JsonTickCodec:
+    """Default codec, ticks are stored as JSON strings"""
+
+    decode_responses = True
+
+    def encode(self, item):
+        return json.dumps(item)
+
+    def decode(self, raw):
+        return json.loads(raw)
+
+
+class BinaryTickCodec:
+    """Fixed 24 byte layout: little-endian float64 epoch, ltp and volume"""
+
+    decode_responses = False
+    layout = struct.Struct("<ddd")
+
+    def encode(self, item):
+        epoch = layout_epoch(item)
+        if epoch in MARKERS:
+            return self.layout.pack(epoch, 0.0, 0.0)
+        return self.layout.pack(
+            float(epoch), float(item["ltp"]), float(item.get("volume", 0))
+        )
+
+    def decode(self, raw):
+        epoch, ltp, volume = self.layout.unpack(raw)
+        if epoch in MARKERS:
+            return MARKERS[epoch]
+        return {"epoch": epoch, "ltp": ltp, "volume": volume}
+
+
+CODECS = {
+    "JSON": JsonTickCodec,
+    "BINARY": BinaryTickCodec,
+}
+
+
+def get_codec(codec):
+    if not isinstance(codec, str):
+        return codec
+    if codec not in CODECS:
+        raise Exception(f"Invalid codec: {codec}")
+    return CODECS[codec]()